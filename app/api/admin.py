@@ -12,6 +12,7 @@ This module provides:
 from fastapi import APIRouter, HTTPException, Depends, status
 from typing import Dict, Any, Optional
 from datetime import datetime
+import asyncio
 import logging
 
 from ..core.security import verify_api_key
@@ -34,7 +35,7 @@ async def system_health(
     Requires API authentication.
     """
     try:
-        health = performance_monitor.get_system_health()
+        health = await asyncio.to_thread(performance_monitor.get_system_health)
         
         return {
             "status": "healthy" if health.cpu_percent < 80 and health.memory_percent < 85 else "warning",
@@ -187,9 +188,7 @@ async def clear_metrics(
     Use with caution - this will reset all collected metrics.
     """
     try:
-        performance_monitor.metrics.clear()
-        performance_monitor.error_count.clear()
-        performance_monitor.endpoint_stats.clear()
+        performance_monitor.clear()
         
         logger.info("Performance metrics cleared by admin")
         
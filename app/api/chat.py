@@ -6,6 +6,7 @@ Provides the main chat interface that will be integrated with the Wix website.
 """
 
 from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, validator
 from typing import Optional, Dict, Any, List
 import uuid
@@ -25,6 +26,9 @@ logger = get_logger(__name__)
 # Create the chat router
 router = APIRouter(prefix="/api/v1", tags=["chat"])
 
+# Sent in place of an answer when the chat endpoints fail
+TECHNICAL_DIFFICULTIES_MESSAGE = "I apologize, but I'm experiencing technical difficulties. Please try again in a moment."
+
 
 # Request/Response Models
 class ChatMessage(BaseModel):
@@ -390,6 +394,30 @@ async def get_relevant_products(context: Dict[str, Any], conversation_id: str =
 
 
 # API Endpoints
+async def get_conversation_context(conversation_id: str) -> Dict[str, Any]:
+    """Accumulate extracted context from the recent messages of a conversation."""
+    conversation_context = {}
+    try:
+        if conversation_id:
+            # Get recent conversation history to maintain context
+            recent_history = await chat_log_manager.get_chat_history(conversation_id, limit=5)
+            if recent_history:
+                # Accumulate context from all previous messages (oldest to newest)
+                for entry in reversed(recent_history):  # Process in chronological order
+                    if entry and entry.get("user_message"):
+                        entry_context = extract_context_from_message(entry["user_message"])
+                        if entry_context:
+                            # Update with each message's context (newer messages override older ones)
+                            conversation_context.update(entry_context)
+                
+                logger.debug(f"Retrieved accumulated conversation context: {conversation_context}")
+                    
+    except Exception as e:
+        logger.warning(f"Could not retrieve conversation context: {e}")
+    
+    return conversation_context
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     message: ChatMessage, 
@@ -412,24 +440,7 @@ async def chat(
         extracted_context = extract_context_from_message(message.message)
         
         # Try to get previous conversation context for continuity
-        conversation_context = {}
-        try:
-            if conversation_id:
-                # Get recent conversation history to maintain context
-                recent_history = await chat_log_manager.get_chat_history(conversation_id, limit=5)
-                if recent_history:
-                    # Accumulate context from all previous messages (oldest to newest)
-                    for entry in reversed(recent_history):  # Process in chronological order
-                        if entry and entry.get("user_message"):
-                            entry_context = extract_context_from_message(entry["user_message"])
-                            if entry_context:
-                                # Update with each message's context (newer messages override older ones)
-                                conversation_context.update(entry_context)
-                    
-                    logger.debug(f"Retrieved accumulated conversation context: {conversation_context}")
-                        
-        except Exception as e:
-            logger.warning(f"Could not retrieve conversation context: {e}")
+        conversation_context = await get_conversation_context(conversation_id)
         
         # Merge contexts: new message context overrides conversation context
         combined_context = {**conversation_context, **extracted_context, **message.user_context}
@@ -546,7 +557,7 @@ async def chat(
         # Return error response
         # error_response = WixResponseFormatter.format_error_response(str(e))
         return ChatResponse(
-            response="I apologize, but I'm experiencing technical difficulties. Please try again in a moment.",
+            response=TECHNICAL_DIFFICULTIES_MESSAGE,
             conversation_id=message.conversation_id or str(uuid.uuid4()),
             context_used=[],
             metadata={
@@ -558,6 +569,82 @@ async def chat(
         )
 
 
+@router.post("/chat/stream")
+async def chat_stream(
+    message: ChatMessage, 
+    request: Request,
+    api_key: str = Depends(verify_api_key) if settings.ENABLE_API_AUTH else None
+) -> StreamingResponse:
+    """
+    Streaming chat endpoint for FreshNutrients AI assistant.
+    
+    Sends the response as plain text chunks while it is generated so the
+    widget can render the first tokens without waiting for the full answer.
+    The conversation ID is returned in the X-Conversation-ID header.
+    """
+    start_time = time.time()
+    conversation_id = message.conversation_id or str(uuid.uuid4())
+    
+    headers = {"X-Conversation-ID": conversation_id}
+    
+    try:
+        extracted_context = extract_context_from_message(message.message)
+        conversation_context = await get_conversation_context(conversation_id)
+        combined_context = {**conversation_context, **extracted_context, **message.user_context}
+        
+        logger.info(f"Processing streaming chat message for conversation {conversation_id}")
+        
+        products = await get_relevant_products(combined_context, conversation_id)
+    except Exception as e:
+        logger.error(f"Chat stream endpoint error: {e}")
+        return StreamingResponse(
+            iter([TECHNICAL_DIFFICULTIES_MESSAGE]),
+            media_type="text/plain; charset=utf-8",
+            headers=headers
+        )
+    
+    async def generate():
+        chunks = []
+        try:
+            async for chunk in llm_service.stream_smart_chat_response(
+                message=message.message,
+                product_context=products,
+                user_context=combined_context
+            ):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"Chat stream error after {len(chunks)} chunks: {e}")
+            # Start the apology on a new paragraph if part of an answer was already sent
+            apology = f"\n\n{TECHNICAL_DIFFICULTIES_MESSAGE}" if chunks else TECHNICAL_DIFFICULTIES_MESSAGE
+            chunks.append(apology)
+            yield apology
+        
+        # Log the conversation once the full response has been sent
+        response_time = time.time() - start_time
+        try:
+            await chat_log_manager.log_chat_interaction(
+                session_id=conversation_id,
+                user_message=message.message,
+                bot_response="".join(chunks),
+                category="product_recommendation",
+                product_context=str([product.get("product_name") for product in products[:10]]),
+                response_time=int(response_time * 1000),  # Convert to milliseconds
+                user_ip=request.client.host if request.client else None,
+                user_agent=request.headers.get("user-agent")
+            )
+        except Exception as e:
+            logger.error(f"Failed to log streamed chat interaction: {e}")
+        
+        logger.info(f"Streamed chat response completed in {response_time:.2f}s")
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/plain; charset=utf-8",
+        headers=headers
+    )
+
+
 @router.get("/session/{conversation_id}", response_model=SessionInfo)
 async def get_session_info(conversation_id: str) -> SessionInfo:
     """
@@ -0,0 +1,273 @@
+"""
+Debug and diagnostic endpoints for FreshNutrients AI Chat API.
+
+This module provides:
+- Environment and database connection checks
+- System status and circuit breaker controls
+- Live smart chat and conversation test scenarios
+
+The router is only included outside production.
+"""
+
+from fastapi import APIRouter
+from typing import Dict, Any, List
+import asyncio
+import logging
+
+from ..config import settings
+from ..core.database import db_manager, product_manager
+from ..core.llm_service import llm_service
+from ..utils.helpers import get_cached_probe
+
+logger = logging.getLogger(__name__)
+
+# Create debug router
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/env")
+async def debug_environment():
+    """Check environment configuration for debugging."""
+    return {
+        "environment": settings.ENVIRONMENT,
+        "azure_sql_configured": settings.is_azure_sql_configured,
+        "azure_openai_configured": settings.is_azure_openai_configured,
+        "azure_sql_server": settings.AZURE_SQL_SERVER,
+        "cors_origins": settings.ALLOWED_ORIGINS,
+        "port": settings.API_PORT
+    }
+
+
+@router.get("/db-test")
+async def debug_database_connection():
+    """Test database connection with detailed error info."""
+    try:
+        db_info = await db_manager.get_database_info()
+        return {
+            "status": "success",
+            "database_info": db_info,
+            "connection_string_format": f"mssql+pymssql://{settings.AZURE_SQL_USERNAME}:***@{settings.AZURE_SQL_SERVER}/{settings.AZURE_SQL_DATABASE}"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_type": type(e).__name__,
+            "error_message": str(e),
+            "connection_string_format": f"mssql+pymssql://{settings.AZURE_SQL_USERNAME}:***@{settings.AZURE_SQL_SERVER}/{settings.AZURE_SQL_DATABASE}"
+        }
+
+
+@router.get("/status")
+async def debug_status():
+    """Essential system status for development monitoring."""
+    return await get_cached_probe("debug_status", _check_debug_status, settings.HEALTH_CACHE_TTL)
+
+
+async def _check_debug_status() -> Dict[str, Any]:
+    """Collect database, LLM connectivity and circuit breaker status."""
+    try:
+        # Get basic system health
+        db_info = await db_manager.get_database_info()
+        llm_results = llm_service.get_last_connectivity()  # Refreshed by the background probe
+        
+        return {
+            "timestamp": "2025-07-11",
+            "database": {
+                "status": db_info.get("status"),
+                "server": settings.AZURE_SQL_SERVER
+            },
+            "llm_service": llm_results,
+            "environment": settings.ENVIRONMENT,
+            "circuit_breaker_open": llm_service._is_azure_circuit_open(),
+            "last_failure": llm_service.last_azure_failure.isoformat() if llm_service.last_azure_failure else None
+        }
+    except Exception as e:
+        logger.error("Debug status failed: %s", e)
+        return {"error": str(e)}
+
+
+@router.post("/reset-circuit-breaker")
+async def reset_circuit_breaker():
+    """Reset the Azure OpenAI circuit breaker."""
+    try:
+        llm_service.reset_circuit_breaker()
+        return {
+            "status": "success",
+            "message": "Circuit breaker reset successfully",
+            "circuit_breaker_open": llm_service._is_azure_circuit_open()
+        }
+    except Exception as e:
+        logger.error("Circuit breaker reset failed: %s", e)
+        return {"error": str(e)}
+
+
+@router.get("/test-smart-chat")
+async def test_smart_chat():
+    """Test the new smart chat functionality with realistic scenarios."""
+    try:
+        scenarios = [
+            {
+                "name": "insufficient_info",
+                "message": "What fertilizer should I use for my Grass Pastures?",
+                "context": {"crop_type": "Grass"},  # Missing application type and problem
+                "description": "Basic question without enough detail"
+            },
+            {
+                "name": "specific_request",
+                "message": "I need a soil fertilizer for my tobacco to help with soil salinity",
+                "context": {
+                    "crop_type": "Field Tobacco", 
+                    "application_type": "Soil",
+                    "problem": "Soil Salinity",
+                    "growth_stage": "Flowering"
+                },
+                "description": "Detailed request with all required parameters"
+            },
+            {
+                "name": "soil_application",
+                "message": "What soil fertilizer do you recommend for potato crops to improve fertilizer efficiency?",
+                "context": {
+                    "crop_type": "Potatoes",
+                    "application_type": "Soil", 
+                    "problem": "Fertilizer Efficiency"
+                },
+                "description": "Specific soil application request"
+            }
+        ]
+        
+        # Use criteria-based search for more accurate product matching, one query for all scenarios
+        # No limit - get all matching products
+        criteria_results = await product_manager.search_products_by_criteria_batch([
+            {
+                "crop": scenario["context"].get("crop_type"),
+                "application_type": scenario["context"].get("application_type"),
+                "problem": scenario["context"].get("problem")
+            }
+            for scenario in scenarios
+        ])
+        
+        async def run_scenario(scenario: Dict[str, Any], products: List[Dict[str, Any]]) -> Dict[str, Any]:
+            context = scenario["context"]
+            
+            # If no specific matches found, fall back to crop search
+            if not products:
+                products = await product_manager.search_products(context["crop_type"])
+            
+            # Remove duplicates by product name while preserving order (dicts keep insertion order)
+            products = list({p["product_name"]: p for p in products if p.get("product_name")}.values())
+            
+            # Get AI response
+            result = await llm_service.get_smart_chat_response(
+                message=scenario["message"],
+                product_context=products,
+                user_context=scenario["context"]
+            )
+            
+            return {
+                "scenario": scenario["name"],
+                "description": scenario["description"],
+                "message": scenario["message"],
+                "context": scenario["context"],
+                "products_available": len(products),
+                "search_method": "criteria" if products else "crop_fallback",
+                "product_names": [p.get("product_name") for p in products[:5]],  # Show first 5 product names
+                "ai_response": result.get("response", "No response"),  # No truncation
+                "status": result.get("status"),
+                "context_analysis": result.get("context_used", {}).get("context_analysis", {})
+            }
+        
+        # Scenarios are independent, so their database and LLM calls can overlap
+        results = await asyncio.gather(*(
+            run_scenario(scenario, products) for scenario, products in zip(scenarios, criteria_results)
+        ))
+        
+        return {
+            "test": "smart_chat_realistic_scenarios",
+            "total_scenarios": len(scenarios),
+            "scenarios": results,
+            "note": "This demonstrates how the AI handles different levels of detail in user requests"
+        }
+        
+    except Exception as e:
+        logger.error("Smart chat test failed: %s", e)
+        return {"error": str(e)}
+
+
+@router.get("/test-intelligent-chat")
+async def test_intelligent_chat():
+    """Test the intelligent chat with automatic context retrieval."""
+    try:
+        # Test message
+        test_message = "I need help with fertilizing my potato crop. What do you recommend?"
+        
+        # User context
+        user_context = {
+            "crop_type": "Potatoes",
+            "location": "Western Cape, South Africa",
+            "growth_stage": "Tuber development"
+        }
+        
+        # Get intelligent response (context automatically retrieved)
+        result = await llm_service.get_intelligent_response(
+            message=test_message,
+            user_context=user_context
+        )
+        
+        return {
+            "test": "intelligent_chat_auto_context",
+            "message": test_message,
+            "user_context": user_context,
+            "result": result
+        }
+        
+    except Exception as e:
+        logger.error("Intelligent chat test failed: %s", e)
+        return {"error": str(e)}
+
+
+@router.get("/test-conversation")
+async def test_conversation():
+    """Test conversation with different farming scenarios."""
+    try:
+        test_scenarios = [
+            {
+                "message": "What NPK ratio should I use for my tomatoes?",
+                "context": {"crop_type": "Tomatoes", "growth_stage": "Flowering"}
+            },
+            {
+                "message": "My lettuce plants have yellowing leaves. What should I do?",
+                "context": {"crop_type": "Lettuce", "problem": "Yellowing leaves"}
+            },
+            {
+                "message": "I need organic fertilizer for vegetables",
+                "context": {"crop_type": "Vegetables", "preference": "Organic"}
+            }
+        ]
+        
+        async def run_scenario(i: int, scenario: Dict[str, Any]) -> Dict[str, Any]:
+            result = await llm_service.get_intelligent_response(
+                message=scenario["message"],
+                user_context=scenario["context"]
+            )
+            
+            return {
+                "scenario": i,
+                "message": scenario["message"],
+                "context": scenario["context"],
+                "response": result.get("response", "No response")[:200] + "..." if len(result.get("response", "")) > 200 else result.get("response", "No response"),
+                "status": result.get("status"),
+                "products_used": result.get("context_used", {}).get("products_count", 0)
+            }
+        
+        # Scenarios are independent, so their LLM calls can overlap
+        results = await asyncio.gather(*(run_scenario(i, scenario) for i, scenario in enumerate(test_scenarios, 1)))
+        
+        return {
+            "test": "conversation_scenarios",
+            "total_scenarios": len(test_scenarios),
+            "results": results
+        }
+        
+    except Exception as e:
+        logger.error("Conversation test failed: %s", e)
+        return {"error": str(e)}
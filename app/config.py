@@ -56,6 +56,14 @@ class Settings(BaseSettings):
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 100  # requests per hour
     RATE_LIMIT_WINDOW: int = 3600   # window in seconds
+    REDIS_URL: str = ""  # e.g. "redis://localhost:6379/0"; in-memory limits when unset
+    
+    # Health Checks
+    HEALTH_CACHE_TTL: int = 5  # seconds a /health or /debug/status result is reused
+    HEALTH_PROBE_TIMEOUT: float = 2.0  # seconds before the /health database probe counts as down
+    
+    # Response Caching
+    CROPS_CACHE_TTL: int = 600  # seconds the rendered /api/crops response is reused
     
     # Request Validation
     MAX_MESSAGE_LENGTH: int = 1000
@@ -17,6 +17,7 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from sqlalchemy.exc import SQLAlchemyError
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from app.config import settings
@@ -28,6 +29,9 @@ logger = get_logger(__name__)
 class DatabaseManager:
     """Manages database connections and operations for Azure SQL Database."""
     
+    POOL_SIZE = 20
+    MAX_OVERFLOW = 10
+    
     def __init__(self):
         self.engine: Optional[Engine] = None
         self.async_engine: Optional[AsyncEngine] = None
@@ -35,6 +39,7 @@ class DatabaseManager:
         self.async_session_factory: Optional[async_sessionmaker] = None
         self._connection_string: Optional[str] = None
         self._async_connection_string: Optional[str] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
         
     def _build_connection_strings(self) -> tuple[str, str]:
         """Build synchronous and asynchronous connection strings."""
@@ -73,13 +78,19 @@ class DatabaseManager:
             self.engine = create_engine(
                 self._connection_string,
                 poolclass=QueuePool,
-                pool_size=10,
-                max_overflow=20,
+                pool_size=self.POOL_SIZE,
+                max_overflow=self.MAX_OVERFLOW,
                 pool_pre_ping=True,
-                pool_recycle=3600,
+                pool_recycle=1800,
                 echo=settings.ENVIRONMENT == "development"
             )
             
+            # pymssql is blocking, so queries run on a thread per pooled connection
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.POOL_SIZE + self.MAX_OVERFLOW,
+                thread_name_prefix="db"
+            )
+            
             # Create session factory
             self.session_factory = sessionmaker(
                 bind=self.engine,
@@ -100,14 +111,12 @@ class DatabaseManager:
     async def test_connection(self) -> bool:
         """Test database connectivity."""
         try:
-            loop = asyncio.get_event_loop()
-            
             def _test_sync():
                 with self.engine.connect() as conn:
                     result = conn.execute(text("SELECT 1 as test"))
                     return result.scalar()
             
-            test_value = await loop.run_in_executor(None, _test_sync)
+            test_value = await self.run_sync(_test_sync)
             
             if test_value == 1:
                 logger.info("Database connection test successful")
@@ -130,29 +139,25 @@ class DatabaseManager:
             raise RuntimeError("Database not initialized. Call initialize() first.")
         
         # Run session operations in thread pool to make them async-compatible
-        loop = asyncio.get_event_loop()
-        
         # Create session in thread pool
-        session = await loop.run_in_executor(None, self.session_factory)
+        session = await self.run_sync(self.session_factory)
         
         try:
             yield session
             # Only commit if auto_commit is True and we're not handling it manually
             if auto_commit:
-                await loop.run_in_executor(None, session.commit)
+                await self.run_sync(session.commit)
         except Exception as e:
             # Rollback in thread pool
-            await loop.run_in_executor(None, session.rollback)
+            await self.run_sync(session.rollback)
             logger.error(f"Database session error: {str(e)}")
             raise
         finally:
             # Close in thread pool
-            await loop.run_in_executor(None, session.close)
+            await self.run_sync(session.close)
     
     async def _execute_in_session(self, session, sql_text, params=None, fetch_results=True):
         """Execute SQL in a session within thread pool."""
-        loop = asyncio.get_event_loop()
-        
         def _execute():
             if params:
                 result = session.execute(sql_text, params)
@@ -170,7 +175,12 @@ class DatabaseManager:
                 # If fetchall() fails, return the result object
                 return result
         
-        return await loop.run_in_executor(None, _execute)
+        return await self.run_sync(_execute)
+    
+    async def run_sync(self, func, *args):
+        """Run a blocking database call on the database thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
     
     async def get_database_info(self) -> Dict[str, Any]:
         """Get database connection information and status."""
@@ -209,6 +219,8 @@ class DatabaseManager:
             if self.engine:
                 self.engine.dispose()
                 logger.info("Database connections closed")
+            if self._executor:
+                self._executor.shutdown(wait=False)
         except Exception as e:
             logger.error(f"Error closing database connections: {str(e)}")
 
@@ -310,8 +322,8 @@ class ProductDataManager:
                     WHERE ProductName = :product_name AND IsDeleted = 0
                 """)
                 
-                result = session.execute(sql, {"product_name": product_name})
-                row = result.fetchone()
+                result = await self.db_manager._execute_in_session(session, sql, {"product_name": product_name})
+                row = result[0] if result else None
                 
                 if row:
                     return {
@@ -358,7 +370,7 @@ class ProductDataManager:
                     ORDER BY ProductName
                 """)
                 
-                result = session.execute(sql, {"query": f"%{query}%"})
+                result = await self.db_manager._execute_in_session(session, sql, {"query": f"%{query}%"})
                 
                 products = []
                 for row in result:
@@ -383,6 +395,77 @@ class ProductDataManager:
             logger.error(f"Error searching products by name: {str(e)}")
             return []
     
+    async def search_products_by_names(self, keywords: List[str], limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """Search product names for several keywords in a single query."""
+        return await self._search_products_batch("ProductName", keywords, limit)
+    
+    async def search_products_by_crops(self, crops: List[str], limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """Search crops for several keywords in a single query."""
+        return await self._search_products_batch("Crop", crops, limit)
+    
+    async def _search_products_batch(self, column: str, queries: List[str], limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        """Run one partial-match search per query as a single UNION ALL statement.
+        
+        Returns a mapping of each query to its (possibly empty) list of products.
+        """
+        results: Dict[str, List[Dict[str, Any]]] = {query: [] for query in queries}
+        if not queries:
+            return results
+        
+        try:
+            async with self.db_manager.get_session() as session:
+                # One TOP-limited SELECT per query, tagged with its index so rows can be split back out
+                selects = []
+                params = {}
+                for i, query in enumerate(queries):
+                    selects.append(f"""
+                        SELECT * FROM (
+                            SELECT TOP {limit}
+                                {i} AS QueryIndex,
+                                Application,
+                                ApplicationType,
+                                Crop,
+                                Directions,
+                                GrowthStage,
+                                Label,
+                                M_Intervention,
+                                MSDS,
+                                Notes,
+                                Problem,
+                                ProductName,
+                                TechDoc
+                            FROM Products
+                            WHERE {column} LIKE :q{i} AND IsDeleted = 0
+                            ORDER BY ProductName
+                        ) AS q{i}
+                    """)
+                    params[f"q{i}"] = f"%{query}%"
+                
+                sql = text(" UNION ALL ".join(selects) + " ORDER BY QueryIndex, ProductName")
+                result = await self.db_manager._execute_in_session(session, sql, params)
+                
+                for row in result:
+                    results[queries[row.QueryIndex]].append({
+                        "application": row.Application,
+                        "application_type": row.ApplicationType,
+                        "crop": row.Crop,
+                        "directions": row.Directions,
+                        "growth_stage": row.GrowthStage,
+                        "label": row.Label,
+                        "m_intervention": row.M_Intervention,
+                        "msds": row.MSDS,
+                        "notes": row.Notes,
+                        "problem": row.Problem,
+                        "product_name": row.ProductName,
+                        "tech_doc": row.TechDoc
+                    })
+                
+                return results
+        
+        except Exception as e:
+            logger.error(f"Error in batched product search on {column}: {str(e)}")
+            return {query: [] for query in queries}
+    
     async def search_products_by_criteria(self, 
                                           crop: str = None, 
                                           application_type: str = None, 
@@ -453,7 +536,7 @@ class ProductDataManager:
                         ORDER BY ProductName
                     """)
                 
-                result = session.execute(sql, params)
+                result = await self.db_manager._execute_in_session(session, sql, params)
                 
                 products = []
                 for row in result:
@@ -478,6 +561,77 @@ class ProductDataManager:
             logger.error(f"Error searching products by criteria: {str(e)}")
             return []
     
+    async def search_products_by_criteria_batch(self, specs: List[Dict[str, Optional[str]]]) -> List[List[Dict[str, Any]]]:
+        """Run several criteria searches in one UNION ALL statement.
+        
+        Each spec may contain crop, application_type and problem, as for
+        search_products_by_criteria. Returns one product list per spec, in order.
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in specs]
+        
+        # One SELECT per spec with at least one criterion, tagged with its index so rows can be split back out
+        selects = []
+        params = {}
+        for i, spec in enumerate(specs):
+            where_conditions = ["IsDeleted = 0"]
+            for field, column in (("crop", "Crop"), ("application_type", "ApplicationType"), ("problem", "Problem")):
+                if spec.get(field):
+                    where_conditions.append(f"{column} LIKE :{field}{i}")
+                    params[f"{field}{i}"] = f"%{spec[field]}%"
+            
+            # Specs without criteria match nothing, as in search_products_by_criteria
+            if len(where_conditions) == 1:
+                continue
+            
+            selects.append(f"""
+                SELECT
+                    {i} AS SpecIndex,
+                    Application,
+                    ApplicationType,
+                    Crop,
+                    Directions,
+                    GrowthStage,
+                    Label,
+                    M_Intervention,
+                    MSDS,
+                    Notes,
+                    Problem,
+                    ProductName,
+                    TechDoc
+                FROM Products
+                WHERE {" AND ".join(where_conditions)}
+            """)
+        
+        if not selects:
+            return results
+        
+        try:
+            async with self.db_manager.get_session() as session:
+                sql = text(" UNION ALL ".join(selects) + " ORDER BY SpecIndex, ProductName")
+                result = await self.db_manager._execute_in_session(session, sql, params)
+                
+                for row in result:
+                    results[row.SpecIndex].append({
+                        "application": row.Application,
+                        "application_type": row.ApplicationType,
+                        "crop": row.Crop,
+                        "directions": row.Directions,
+                        "growth_stage": row.GrowthStage,
+                        "label": row.Label,
+                        "m_intervention": row.M_Intervention,
+                        "msds": row.MSDS,
+                        "notes": row.Notes,
+                        "problem": row.Problem,
+                        "product_name": row.ProductName,
+                        "tech_doc": row.TechDoc
+                    })
+                
+                return results
+        
+        except Exception as e:
+            logger.error(f"Error in batched criteria search: {str(e)}")
+            return [[] for _ in specs]
+    
     async def get_crops(self) -> List[str]:
         """Get all crop types."""
         try:
@@ -489,7 +643,7 @@ class ProductDataManager:
                     ORDER BY Crop
                 """)
                 
-                result = session.execute(sql)
+                result = await self.db_manager._execute_in_session(session, sql)
                 crops = [row.Crop for row in result]
                 
                 return crops
@@ -509,7 +663,7 @@ class ProductDataManager:
                     ORDER BY Problem
                 """)
                 
-                result = session.execute(sql)
+                result = await self.db_manager._execute_in_session(session, sql)
                 problems = [row.Problem for row in result]
                 
                 return problems
@@ -529,7 +683,7 @@ class ProductDataManager:
                     ORDER BY ApplicationType
                 """)
                 
-                result = session.execute(sql)
+                result = await self.db_manager._execute_in_session(session, sql)
                 app_types = [row.ApplicationType for row in result]
                 
                 return app_types
@@ -549,7 +703,7 @@ class ProductDataManager:
                     ORDER BY GrowthStage
                 """)
                 
-                result = session.execute(sql)
+                result = await self.db_manager._execute_in_session(session, sql)
                 stages = [row.GrowthStage for row in result]
                 
                 return stages
@@ -581,7 +735,7 @@ class ProductDataManager:
                     ORDER BY ProductName
                 """)
                 
-                result = session.execute(sql, {
+                result = await self.db_manager._execute_in_session(session, sql, {
                     "crop": f"%{crop}%",
                     "limit": limit
                 })
@@ -632,7 +786,7 @@ class ProductDataManager:
                     ORDER BY ProductName
                 """)
                 
-                result = session.execute(sql, {
+                result = await self.db_manager._execute_in_session(session, sql, {
                     "problem": f"%{problem}%",
                     "limit": limit
                 })
@@ -711,8 +865,6 @@ class ChatLogManager:
         """Log a chat interaction."""
         try:
             # Simple synchronous approach run in thread pool
-            loop = asyncio.get_event_loop()
-            
             def _log_sync():
                 with self.db_manager.engine.connect() as conn:
                     sql = text("""
@@ -737,7 +889,7 @@ class ChatLogManager:
                     conn.commit()
                     return True
             
-            result = await loop.run_in_executor(None, _log_sync)
+            result = await self.db_manager.run_sync(_log_sync)
             return result
                 
         except Exception as e:
@@ -748,8 +900,6 @@ class ChatLogManager:
         """Get chat history for a session."""
         try:
             # Simple synchronous approach run in thread pool
-            loop = asyncio.get_event_loop()
-            
             def _get_history_sync():
                 with self.db_manager.engine.connect() as conn:
                     # Fix the TOP parameter issue - can't use parameter binding for TOP clause
@@ -785,7 +935,7 @@ class ChatLogManager:
                     
                     return history
             
-            history = await loop.run_in_executor(None, _get_history_sync)
+            history = await self.db_manager.run_sync(_get_history_sync)
             return history
                 
         except Exception as e:
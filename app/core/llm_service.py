@@ -5,9 +5,16 @@ Handles Azure OpenAI integration with circuit breaker pattern
 for reliable customer-facing chat responses.
 """
 
+import asyncio
+import functools
+import hashlib
 import logging
-from typing import Optional, Dict, Any, List
-from openai import AzureOpenAI
+import sys
+import time
+from collections import OrderedDict, deque
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+import httpx
+from openai import APITimeoutError, AsyncAzureOpenAI
 from datetime import datetime, timedelta
 import json
 
@@ -16,45 +23,113 @@ from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Context scenarios returned by LLMService._has_sufficient_context
+SCENARIO_PRODUCT_DIRECT = sys.intern('product_direct')
+SCENARIO_CROP_ONLY = sys.intern('crop_only')
+SCENARIO_PROBLEM_FOCUSED = sys.intern('problem_focused')
+SCENARIO_PROBLEM_AND_CROP = sys.intern('problem_and_crop')
+SCENARIO_APPLICATION_ONLY = sys.intern('application_only')
+SCENARIO_INSUFFICIENT = sys.intern('insufficient')
+
+# Bound how long a hung Azure connection can hold a request (SDK default read timeout is 10 minutes)
+AZURE_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=5.0)
+AZURE_MAX_RETRIES = 2
+
+# Keep warm connections around so bursts of chat requests reuse TLS sessions to Azure
+# (httpx drops idle connections after 5 seconds by default)
+AZURE_CONNECTION_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=100, keepalive_expiry=60.0)
+
+
+def create_azure_http_client() -> httpx.AsyncClient:
+    """Create the pooled HTTP/2 client shared by all Azure OpenAI calls."""
+    # HTTP/2 lets concurrent chat requests multiplex over one TLS connection
+    return httpx.AsyncClient(http2=True, limits=AZURE_CONNECTION_LIMITS, timeout=AZURE_TIMEOUT)
+
 
 class ContextEngine:
     """Intelligent context retrieval for farming conversations."""
     
+    MAX_CONTEXT_PRODUCTS = 25
+    CACHE_MAX_ENTRIES = 512
+    CACHE_TTL_SECONDS = 60
+    
     def __init__(self, product_manager):
         self.product_manager = product_manager
+        # LRU of (message, user context) -> (monotonic timestamp, products)
+        self._context_cache: "OrderedDict[tuple, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
         
     async def get_relevant_context(self, message: str, user_context: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Get relevant product context, reusing recent results for repeated queries."""
+        cache_key = self._cache_key(message, user_context)
+        if cache_key is not None:
+            cached = self._context_cache.get(cache_key)
+            if cached and time.monotonic() - cached[0] < self.CACHE_TTL_SECONDS:
+                self._context_cache.move_to_end(cache_key)
+                return list(cached[1])
+        
+        products = await self._retrieve_context(message, user_context)
+        
+        # Only cache non-empty results so a transient database error is not remembered
+        if cache_key is not None and products:
+            self._context_cache[cache_key] = (time.monotonic(), products)
+            self._context_cache.move_to_end(cache_key)
+            if len(self._context_cache) > self.CACHE_MAX_ENTRIES:
+                self._context_cache.popitem(last=False)
+        
+        return list(products)
+    
+    def invalidate_cache(self) -> None:
+        """Drop all cached context, e.g. after the product catalog changes."""
+        self._context_cache.clear()
+    
+    @staticmethod
+    def _cache_key(message: str, user_context: Optional[Dict[str, Any]]) -> Optional[tuple]:
+        """Build a hashable cache key, or None if the user context can't be hashed."""
+        try:
+            key = (message.lower().strip(), tuple(sorted((user_context or {}).items())))
+            hash(key)
+            return key
+        except TypeError:
+            return None
+    
+    async def _retrieve_context(self, message: str, user_context: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Get relevant product context based on message and user context."""
-        relevant_products = []
+        # Unique products in first-seen order, deduplicated as results arrive
+        relevant_products: Dict[tuple, Dict[str, Any]] = {}
         
         # Extract keywords for product search
-        farming_keywords = self._extract_farming_keywords(message)
+        farming_keywords = self._extract_farming_keywords(message, limit=2)
         
         # Search by user's specified crop if available
         if user_context and user_context.get('crop_type'):
             crop_products = await self.product_manager.search_products(
                 user_context['crop_type'], limit=50  # Increased to capture all crop products
             )
-            relevant_products.extend(crop_products)
+            self._add_unique_products(relevant_products, crop_products)
         
         # Search by detected keywords
-        for keyword in farming_keywords[:2]:  # Limit to top 2 keywords
-            if keyword:
-                # Try product name search first
-                name_products = await self.product_manager.search_products_by_name(keyword, limit=2)
-                relevant_products.extend(name_products)
-                
-                # Try crop search if no name matches
-                if not name_products:
-                    crop_products = await self.product_manager.search_products(keyword, limit=2)
-                    relevant_products.extend(crop_products)
-        
-        # Remove exact duplicates while preserving order
-        # Create unique key based on multiple fields to allow same product with different applications/stages
-        seen_combinations = set()
-        unique_products = []
-        for product in relevant_products:
-            # Create a unique key from multiple fields to identify exact duplicates
+        keywords = [keyword for keyword in farming_keywords if keyword]  # Limited to top 2 keywords
+        if keywords and len(relevant_products) < self.MAX_CONTEXT_PRODUCTS:
+            # Try product name search first, one query for all keywords
+            name_hits = await self.product_manager.search_products_by_names(keywords, limit=2)
+            
+            # Try crop search for keywords with no name matches
+            misses = [keyword for keyword in keywords if not name_hits.get(keyword)]
+            crop_hits = await self.product_manager.search_products_by_crops(misses, limit=2) if misses else {}
+            
+            for keyword in keywords:
+                self._add_unique_products(
+                    relevant_products, name_hits.get(keyword) or crop_hits.get(keyword, [])
+                )
+        
+        # Return up to 25 unique products to capture all variations
+        return list(relevant_products.values())[:self.MAX_CONTEXT_PRODUCTS]
+    
+    @staticmethod
+    def _add_unique_products(acc: Dict[tuple, Dict[str, Any]], products: List[Dict[str, Any]]) -> None:
+        """Add products to the accumulator, skipping exact duplicates."""
+        # Key on multiple fields to allow same product with different applications/stages
+        for product in products:
             unique_key = (
                 product.get('product_name', ''),
                 product.get('crop', ''),
@@ -63,15 +138,10 @@ class ContextEngine:
                 product.get('problem', ''),
                 product.get('application_type', '')
             )
-            
-            if unique_key not in seen_combinations:
-                seen_combinations.add(unique_key)
-                unique_products.append(product)
-        
-        return unique_products[:25]  # Return up to 25 unique products to capture all variations
+            acc.setdefault(unique_key, product)
     
-    def _extract_farming_keywords(self, message: str) -> List[str]:
-        """Extract farming-related keywords from user message."""
+    def _extract_farming_keywords(self, message: str, limit: Optional[int] = None) -> List[str]:
+        """Extract farming-related keywords from user message, stopping after `limit` matches."""
         # Common farming and fertilizer keywords
         farming_terms = {
             'fertilizer', 'fertiliser', 'speciality fertilizer', 'specialty fertilizer', 'npk', 'nitrogen', 'phosphorus', 'potassium',
@@ -90,6 +160,8 @@ class ContextEngine:
         for term in farming_terms:
             if term in message_lower:
                 found_keywords.append(term.title())
+                if limit and len(found_keywords) >= limit:
+                    break
         
         return found_keywords
 
@@ -202,6 +274,190 @@ REMEMBER: Use headings, indentation, and visual breaks to make responses easy to
 - Consult with local agricultural extension services for regional advice
 """
 
+    # Per-scenario response guidance, appended to the user context section
+    TIMING_GUIDANCE = """
+🕐 TIMING QUESTION DETECTED - SPECIAL RESPONSE FORMAT REQUIRED
+
+CRITICAL INSTRUCTIONS FOR TIMING QUESTIONS:
+You MUST respond in this exact format:
+
+1. START your response with: "For detailed application timing information, please check the documentation for the following products that match your criteria:"
+
+2. Then list ALL {product_count} products showing:
+   - Product name, crop, application details, growth stage, problem
+   - Emphasize documentation links (marked with 📋) for timing information
+   - Include all available links: Directions, Labels, Technical Documents
+
+3. END with: "These product documents contain specific timing schedules, application frequencies, and seasonal recommendations for optimal results."
+
+DO NOT show technical instructions or error messages to the user. Follow the format above exactly.
+"""
+
+    PH_UNIFIED_GUIDANCE = """
+📋 pH ISSUES DETECTED - UNIFIED SOLUTION:
+- User mentioned pH concerns (could be acidic or alkaline soil)
+- Products available: {product_count} pH-balancing products found
+- These products work for both low pH (acidic) and high pH (alkaline/salty) soil conditions
+
+RESPONSE GUIDANCE:
+1. START with: "Great news! I found FreshNutrients products that help balance soil pH whether your soil is too acidic (low pH) or too alkaline (high pH)."
+
+2. Present the products clearly explaining their dual-purpose nature:
+   - Mention that these products work for both acidic and alkaline soil conditions
+   - Explain how they help buffer and balance soil pH naturally
+   - Include application instructions and timing
+
+3. OPTIONALLY add education: "Whether your soil shows signs of acidity (stunted growth, nutrient lockout) or alkalinity (salty/crusty appearance), these products will help restore proper pH balance."
+
+4. Include all document links for each product
+5. Use the friendly format from your main instructions
+"""
+
+    PRODUCT_DIRECT_GUIDANCE = """
+📋 PRODUCT DIRECT REQUEST:
+- User requested specific product information
+- Products available: {product_count} matching products found
+
+RESPONSE GUIDANCE:
+1. Present the specific FreshNutrients product(s) they asked about
+2. Include complete product details, benefits, and application instructions
+3. Include all document links for the product
+4. Use the friendly format from your main instructions
+"""
+
+    CROP_ONLY_GUIDANCE = """
+📋 CROP ONLY PROVIDED:
+- User mentioned crop but no specific problem or application method
+- Products available: {product_count} general crop products found
+- Prompt message: {prompt_message}
+
+RESPONSE GUIDANCE:
+1. Show available FreshNutrients products for their crop
+2. Include the prompt message to ask for more specific details
+3. Explain that knowing their specific problem or application method will help provide better recommendations
+4. Use the friendly format from your main instructions
+"""
+
+    PROBLEM_FOCUSED_GUIDANCE = """
+📋 PROBLEM FOCUSED REQUEST:
+- User specified a problem but no crop
+- Products available: {product_count} problem-solving products found
+- Prompt message: {prompt_message}
+
+RESPONSE GUIDANCE:
+1. Present all {product_count} FreshNutrients products that address their problem
+2. Include complete details and application instructions for each product
+3. Include the prompt message to ask for crop information for more targeted recommendations
+4. Use the friendly format from your main instructions
+"""
+
+    OPTIMAL_CONTEXT_GUIDANCE = """
+📋 OPTIMAL CONTEXT PROVIDED:
+- User specified both problem and crop
+- Products available: {product_count} targeted products found
+- Information completeness: {completeness_score:.0%}
+
+RESPONSE GUIDANCE:
+1. Present all {product_count} FreshNutrients products that match their criteria
+2. Include complete details, benefits, and application instructions
+3. Include all document links for each product
+4. If multiple products are suitable, explain the differences to help the user choose
+5. Use the friendly format from your main instructions
+"""
+
+    CONTEXT_ANALYSIS_GUIDANCE = """
+📋 CONTEXT ANALYSIS:
+- Scenario: {scenario}
+- Information completeness: {completeness_score:.0%}
+- Products available: {product_count} matching products found
+- Prompt message: {prompt_message}
+
+RESPONSE GUIDANCE:
+1. Present available FreshNutrients products that match the user's criteria
+2. Include the prompt message to ask for additional helpful details
+3. Use the friendly format from your main instructions
+4. Include all document links for each product
+"""
+
+    NO_PRODUCTS_GUIDANCE = """
+NO PRODUCTS FOUND - PROVIDE HELPFUL GUIDANCE:
+
+Scenario: {scenario}
+Prompt: {prompt_message}
+
+Respond with a friendly message that:
+1. Acknowledges their inquiry about farming/soil/plant needs
+2. Uses the specific prompt message to guide them toward providing helpful information
+3. Mentions that FreshNutrients has products for many different crops and problems
+4. Keeps the conversation focused on what they need help with
+
+DO NOT mention technical details, database searches, or system information. Keep it conversational and helpful.
+
+EXAMPLE: "I'd be happy to help you find the right FreshNutrients products! {prompt_message} FreshNutrients has specialized products to help address various farming challenges."
+"""
+
+    # Static halves of the system prompt around the {product_context} slot,
+    # with the safety guidelines already appended to the tail
+    _PROMPT_HEAD, _PROMPT_TAIL = SYSTEM_PROMPT_BASE.split("{product_context}")
+    _PROMPT_TAIL += "\n\n" + SAFETY_GUIDELINES
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def build_guidance(
+        scenario: str,
+        product_count: int,
+        prompt_message: Optional[str] = None,
+        completeness_score: float = 0.0,
+        timing_question: bool = False,
+        ph_unified: bool = False
+    ) -> str:
+        """Build the response guidance block for a context scenario (memoized)."""
+        # Check if this is a timing question first - timing questions get special handling
+        if timing_question:
+            # TIMING QUESTIONS get priority handling
+            return FarmingPrompts.TIMING_GUIDANCE.format(product_count=product_count)
+        
+        # Standard product guidance for non-timing questions using new IPO logic
+        if product_count > 0:
+            # Special handling for unified pH product
+            if ph_unified:
+                return FarmingPrompts.PH_UNIFIED_GUIDANCE.format(product_count=product_count)
+            elif scenario == SCENARIO_PRODUCT_DIRECT:
+                # User asked about a specific product - show that product info immediately
+                return FarmingPrompts.PRODUCT_DIRECT_GUIDANCE.format(product_count=product_count)
+            elif scenario == SCENARIO_CROP_ONLY:
+                # User only provided crop - prompt for more context while showing any available products
+                return FarmingPrompts.CROP_ONLY_GUIDANCE.format(
+                    product_count=product_count,
+                    prompt_message=prompt_message or ''
+                )
+            elif scenario == SCENARIO_PROBLEM_FOCUSED:
+                # User provided problem - show products but prompt for crop for better targeting
+                return FarmingPrompts.PROBLEM_FOCUSED_GUIDANCE.format(
+                    product_count=product_count,
+                    prompt_message=prompt_message or ''
+                )
+            elif scenario == SCENARIO_PROBLEM_AND_CROP:
+                # User provided both problem and crop - perfect context
+                return FarmingPrompts.OPTIMAL_CONTEXT_GUIDANCE.format(
+                    product_count=product_count,
+                    completeness_score=completeness_score
+                )
+            else:
+                # Other scenarios - application only, insufficient, etc.
+                return FarmingPrompts.CONTEXT_ANALYSIS_GUIDANCE.format(
+                    scenario=scenario,
+                    completeness_score=completeness_score,
+                    product_count=product_count,
+                    prompt_message=prompt_message or 'Could you provide more details about what you need help with?'
+                )
+        
+        # No products found - provide helpful guidance based on scenario
+        return FarmingPrompts.NO_PRODUCTS_GUIDANCE.format(
+            scenario=scenario,
+            prompt_message=prompt_message or 'To provide the best product recommendation, could you tell me what specific problem you\'re trying to solve?'
+        )
+    
     @staticmethod
     def create_system_prompt(product_context: str = "", user_context: str = "") -> str:
         """Create a complete system prompt with context."""
@@ -212,23 +468,112 @@ REMEMBER: Use headings, indentation, and visual breaks to make responses easy to
                 user_context=user_context
             )
         
-        return FarmingPrompts.SYSTEM_PROMPT_BASE.format(
-            product_context=context_section
-        ) + "\n\n" + FarmingPrompts.SAFETY_GUIDELINES
+        return FarmingPrompts._PROMPT_HEAD + context_section + FarmingPrompts._PROMPT_TAIL
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker for Azure OpenAI calls."""
+    
+    CLOSED = sys.intern('closed')
+    OPEN = sys.intern('open')
+    HALF_OPEN = sys.intern('half_open')
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, failure_window: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_window = failure_window
+        self.state = self.CLOSED
+        self.opened_at = 0.0  # Monotonic time the circuit opened (or the last half-open probe started)
+        self.last_failure_at = 0.0  # Monotonic time of the last failure, 0 if none since the last success
+        self._failures: deque = deque()
+    
+    @property
+    def last_failure(self) -> Optional[datetime]:
+        """Wall-clock time of the last failure, derived only when reported (e.g. by /health)."""
+        if not self.last_failure_at:
+            return None
+        return datetime.now() - timedelta(seconds=time.monotonic() - self.last_failure_at)
+    
+    def is_open(self) -> bool:
+        """Check whether calls are currently being rejected, without claiming a probe."""
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+    
+    def allow_request(self) -> bool:
+        """Return True if a call may go to Azure; moves an expired open circuit to half-open."""
+        if self.state == self.CLOSED:
+            return True
+        
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_timeout:
+            # Still open, or a half-open probe is already in flight
+            return False
+        
+        # Let a single probe through; another is allowed if this one never reports back
+        self.state = self.HALF_OPEN
+        self.opened_at = now
+        logger.info("Azure OpenAI circuit breaker half-open, sending probe request")
+        return True
+    
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        if self.state != self.CLOSED:
+            logger.info("Azure OpenAI circuit breaker closed")
+        self.state = self.CLOSED
+        self.last_failure_at = 0.0
+        self._failures.clear()
+    
+    def record_failure(self) -> None:
+        """Count a failed call and open the circuit once the threshold is reached."""
+        now = time.monotonic()
+        self.last_failure_at = now
+        self._failures.append(now)
+        
+        # Only failures inside the rolling window count towards the threshold
+        while self._failures and now - self._failures[0] > self.failure_window:
+            self._failures.popleft()
+        
+        if self.state == self.HALF_OPEN or len(self._failures) >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Azure OpenAI circuit breaker opened after {len(self._failures)} failures")
+            self.state = self.OPEN
+            self.opened_at = now
+    
+    def reset(self) -> None:
+        """Force the circuit closed."""
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.last_failure_at = 0.0
+        self._failures.clear()
 
 
 class LLMService:
     """Manages Azure OpenAI interactions with circuit breaker reliability pattern."""
     
+    # User context keys and their labels, in the order shown to the model
+    _USER_CONTEXT_FIELDS = (
+        ('crop_type', 'Target Crop'),
+        ('location', 'Location'),
+        ('application_type', 'Application Type'),
+        ('problem', 'Problem'),
+        ('growth_stage', 'Growth Stage'),
+    )
+    
+    # How long test_connectivity results are reused, so health probes don't each hit Azure
+    CONNECTIVITY_TTL_OK = 27
+    CONNECTIVITY_TTL_FAILED = 9
+    
     def __init__(self):
-        self.azure_client: Optional[AzureOpenAI] = None
+        self.azure_client: Optional[AsyncAzureOpenAI] = None
         self.azure_available = False
-        self.last_azure_failure: Optional[datetime] = None
-        self.circuit_breaker_timeout = 300  # 5 minutes
+        self.circuit_breaker = CircuitBreaker()
+        self._connectivity_cache: Optional[Tuple[float, Dict[str, Any]]] = None  # (monotonic time, result)
+        self._connectivity_lock = asyncio.Lock()
+        self._inflight: Dict[bytes, asyncio.Future] = {}  # Prompt digest -> pending Azure request
+        self._owns_http_client = False  # Whether close() should close the client's connection pool
         self.context_engine: Optional[ContextEngine] = None
         
-    def initialize(self, product_manager=None) -> bool:
-        """Initialize Azure OpenAI client and context engine."""
+    def initialize(self, product_manager=None, http_client: Optional[httpx.AsyncClient] = None) -> bool:
+        """Initialize Azure OpenAI client and context engine (reusing http_client when given)."""
         
         # Initialize context engine if product manager is provided
         if product_manager:
@@ -238,11 +583,16 @@ class LLMService:
         # Initialize Azure OpenAI
         if settings.is_azure_openai_configured:
             try:
-                self.azure_client = AzureOpenAI(
+                self.azure_client = AsyncAzureOpenAI(
                     api_key=settings.AZURE_OPENAI_KEY,
                     api_version=settings.AZURE_OPENAI_API_VERSION,
-                    azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
+                    azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+                    timeout=AZURE_TIMEOUT,
+                    max_retries=AZURE_MAX_RETRIES,
+                    http_client=http_client or create_azure_http_client()
                 )
+                # A client passed in is closed by whoever created it
+                self._owns_http_client = http_client is None
                 self.azure_available = True
                 logger.info("Azure OpenAI client initialized successfully")
                 return True
@@ -252,15 +602,30 @@ class LLMService:
         logger.error("Azure OpenAI could not be initialized")
         return False
         
+    async def close(self) -> None:
+        """Close the Azure OpenAI client, and its connection pool unless one was passed to initialize."""
+        if self.azure_client:
+            if self._owns_http_client:
+                try:
+                    await self.azure_client.close()
+                    logger.info("Azure OpenAI client closed")
+                except Exception as e:
+                    logger.error(f"Error closing Azure OpenAI client: {e}")
+            self.azure_client = None
+            self.azure_available = False
+    
+    @property
+    def last_azure_failure(self) -> Optional[datetime]:
+        """Wall-clock time of the last Azure OpenAI failure."""
+        return self.circuit_breaker.last_failure
+    
     def _is_azure_circuit_open(self) -> bool:
         """Check if Azure circuit breaker is open."""
-        if not self.last_azure_failure:
-            return False
-        return datetime.now() - self.last_azure_failure < timedelta(seconds=self.circuit_breaker_timeout)
+        return self.circuit_breaker.is_open()
     
     def reset_circuit_breaker(self) -> None:
         """Reset the circuit breaker to allow Azure OpenAI calls."""
-        self.last_azure_failure = None
+        self.circuit_breaker.reset()
         logger.info("Azure OpenAI circuit breaker reset")
     
     def _format_product_context(self, products: List[Dict[str, Any]], user_context: Dict[str, Any] = None) -> str:
@@ -271,6 +636,9 @@ class LLMService:
         # Check if this is a timing-related question
         is_timing_question = user_context and user_context.get("timing_question", False)
         
+        # Document labels depend only on the question type, so pick them once
+        directions_label = "Application Directions" if is_timing_question else "Product Directions"
+        
         context_parts = []
         for i, product in enumerate(products, 1):
             # Build simple product information without asterisks or database formatting
@@ -283,8 +651,8 @@ class LLMService:
             ]
             
             # Add Notes if available
-            if product.get('notes'):
-                product_lines.append(f"   Notes: {product.get('notes')}")
+            if notes := product.get('notes'):
+                product_lines.append(f"   Notes: {notes}")
             
             # For timing questions, emphasize that timing information is available
             if is_timing_question:
@@ -299,35 +667,22 @@ class LLMService:
             
             # Add clean document references with actual links
             docs = []
-            if product.get('directions'):
-                url = product.get('directions')
+            if url := product.get('directions'):
                 if url.startswith('//'):
                     url = 'https:' + url
-                if is_timing_question:
-                    docs.append(f"Application Directions - {url}")
-                else:
-                    docs.append(f"Product Directions - {url}")
-            if product.get('label'):
-                url = product.get('label')
+                docs.append(f"{directions_label} - {url}")
+            if url := product.get('label'):
                 if url.startswith('//'):
                     url = 'https:' + url
-                if is_timing_question:
-                    docs.append(f"Product Label - {url}")
-                else:
-                    docs.append(f"Product Label - {url}")
-            if product.get('msds'):
-                url = product.get('msds')
+                docs.append(f"Product Label - {url}")
+            if url := product.get('msds'):
                 if url.startswith('//'):
                     url = 'https:' + url
                 docs.append(f"Safety Data - {url}")
-            if product.get('tech_doc'):
-                url = product.get('tech_doc')
+            if url := product.get('tech_doc'):
                 if url.startswith('//'):
                     url = 'https:' + url
-                if is_timing_question:
-                    docs.append(f"Technical Document - {url}")
-                else:
-                    docs.append(f"Technical Document - {url}")
+                docs.append(f"Technical Document - {url}")
             
             if docs:
                 product_lines.append("   Documents:")
@@ -343,67 +698,65 @@ class LLMService:
         if not user_context:
             return "No specific user context provided."
         
-        context_parts = []
-        if user_context.get('crop_type'):
-            context_parts.append(f"- Target Crop: {user_context['crop_type']}")
-        if user_context.get('location'):
-            context_parts.append(f"- Location: {user_context['location']}")
-        if user_context.get('application_type'):
-            context_parts.append(f"- Application Type: {user_context['application_type']}")
-        if user_context.get('problem'):
-            context_parts.append(f"- Problem: {user_context['problem']}")
-        if user_context.get('growth_stage'):
-            context_parts.append(f"- Growth Stage: {user_context['growth_stage']}")
+        context_parts = [
+            f"- {label}: {value}"
+            for key, label in self._USER_CONTEXT_FIELDS
+            if (value := user_context.get(key))
+        ]
         
         return "\n".join(context_parts) if context_parts else "General farming inquiry"
     
     def _has_sufficient_context(self, user_context: Dict[str, Any]) -> Dict[str, Any]:
         """Check if we have sufficient context for a good recommendation based on new IPO logic."""
+        crop_type = user_context.get('crop_type')
+        problem = user_context.get('problem')
+        application_type = user_context.get('application_type')
+        
         # If user provided a specific product, we can show that info immediately
         if user_context.get('product'):
             return {
                 'sufficient': True,
                 'missing_params': [],
                 'completeness_score': 1.0,
-                'scenario': 'product_direct'
+                'scenario': SCENARIO_PRODUCT_DIRECT
             }
         
         # If user only provided crop, prompt for more context
-        if user_context.get('crop_type') and not user_context.get('problem') and not user_context.get('application_type'):
+        if crop_type and not problem and not application_type:
             return {
                 'sufficient': False,
                 'missing_params': ['problem', 'application_type'],
                 'completeness_score': 0.33,
-                'scenario': 'crop_only',
+                'scenario': SCENARIO_CROP_ONLY,
                 'prompt_message': 'I see you mentioned a crop. To provide the best recommendation, could you tell me what specific problem you\'re trying to solve or what application method you plan to use?'
             }
         
         # If user provided problem, we can list products but should prompt for crop for better targeting
-        if user_context.get('problem') and not user_context.get('crop_type'):
+        if problem and not crop_type:
             return {
                 'sufficient': True,  # Can provide products for the problem
                 'missing_params': ['crop_type'],
                 'completeness_score': 0.67,
-                'scenario': 'problem_focused',
+                'scenario': SCENARIO_PROBLEM_FOCUSED,
                 'prompt_message': 'I can show you products for this problem. For more targeted recommendations, what crop are you working with?'
             }
         
         # If we have problem and crop, that's good enough for recommendations
-        if user_context.get('problem') and user_context.get('crop_type'):
+        if problem and crop_type:
             return {
                 'sufficient': True,
                 'missing_params': [],
                 'completeness_score': 1.0,
-                'scenario': 'problem_and_crop'
+                'scenario': SCENARIO_PROBLEM_AND_CROP
             }
         
         # If we have application method but no problem, prompt for more
-        if user_context.get('application_type') and not user_context.get('problem'):
+        if application_type and not problem:
             return {
                 'sufficient': False,
                 'missing_params': ['problem'],
                 'completeness_score': 0.33,
-                'scenario': 'application_only',
+                'scenario': SCENARIO_APPLICATION_ONLY,
                 'prompt_message': 'I see you mentioned an application method. What specific problem are you trying to solve?'
             }
         
@@ -412,10 +765,43 @@ class LLMService:
             'sufficient': False,
             'missing_params': ['problem'],
             'completeness_score': 0.0,
-            'scenario': 'insufficient',
+            'scenario': SCENARIO_INSUFFICIENT,
             'prompt_message': 'To help you find the right products, could you tell me what problem you\'re trying to solve with your crops?'
         }
         
+    def _build_smart_system_prompt(
+        self,
+        product_context: List[Dict[str, Any]] = None,
+        user_context: Dict[str, Any] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build the farming system prompt and return it with the context analysis."""
+        # Analyze if we have sufficient context for a good recommendation
+        context_analysis = self._has_sufficient_context(user_context or {})
+        
+        # Format context information
+        product_context_str = self._format_product_context(product_context or [], user_context)
+        user_context_str = self._format_user_context(user_context or {})
+        
+        # Scenario guidance is cached on its inputs, so repeat requests skip the formatting
+        guidance = FarmingPrompts.build_guidance(
+            scenario=context_analysis.get('scenario', SCENARIO_INSUFFICIENT),
+            product_count=len(product_context) if product_context else 0,
+            prompt_message=context_analysis.get('prompt_message'),
+            completeness_score=context_analysis['completeness_score'],
+            timing_question=bool(user_context and user_context.get("timing_question", False)),
+            ph_unified=bool(user_context and user_context.get("ph_unified_product"))
+        )
+        
+        user_context_str = "\n\n".join((user_context_str, guidance))
+        
+        # Create farming-specific system prompt
+        system_prompt = FarmingPrompts.create_system_prompt(
+            product_context=product_context_str,
+            user_context=user_context_str
+        )
+        
+        return system_prompt, context_analysis
+    
     async def get_smart_chat_response(
         self, 
         message: str, 
@@ -425,188 +811,16 @@ class LLMService:
         """Get intelligent chat response with farming context and safety guardrails."""
         
         # Check if Azure OpenAI is available and circuit is closed
-        if not self.azure_available:
-            return {
-                "response": self._get_emergency_response(),
-                "provider": "emergency",
-                "status": "service_unavailable"
-            }
-            
-        if self._is_azure_circuit_open():
-            return {
-                "response": self._get_emergency_response(),
-                "provider": "emergency", 
-                "status": "circuit_breaker_open"
-            }
+        unavailable = self._get_unavailable_response()
+        if unavailable:
+            return unavailable
             
         try:
-            # Analyze if we have sufficient context for a good recommendation
-            context_analysis = self._has_sufficient_context(user_context or {})
-            
-            # Format context information
-            product_context_str = self._format_product_context(product_context or [], user_context)
-            user_context_str = self._format_user_context(user_context or {})
-            
-            # Check if this is a timing question first - timing questions get special handling
-            if user_context and user_context.get("timing_question", False):
-                # TIMING QUESTIONS get priority handling
-                timing_guidance = f"""
-🕐 TIMING QUESTION DETECTED - SPECIAL RESPONSE FORMAT REQUIRED
-
-CRITICAL INSTRUCTIONS FOR TIMING QUESTIONS:
-You MUST respond in this exact format:
-
-1. START your response with: "For detailed application timing information, please check the documentation for the following products that match your criteria:"
-
-2. Then list ALL {len(product_context) if product_context else 0} products showing:
-   - Product name, crop, application details, growth stage, problem
-   - Emphasize documentation links (marked with 📋) for timing information
-   - Include all available links: Directions, Labels, Technical Documents
-
-3. END with: "These product documents contain specific timing schedules, application frequencies, and seasonal recommendations for optimal results."
-
-DO NOT show technical instructions or error messages to the user. Follow the format above exactly.
-"""
-                user_context_str += f"\n\n{timing_guidance}"
-            else:
-                # Standard product guidance for non-timing questions using new IPO logic
-                scenario = context_analysis.get('scenario', 'insufficient')
-                
-                if product_context and len(product_context) > 0:
-                    # Special handling for unified pH product
-                    if user_context and user_context.get("ph_unified_product"):
-                        context_guidance = f"""
-📋 pH ISSUES DETECTED - UNIFIED SOLUTION:
-- User mentioned pH concerns (could be acidic or alkaline soil)
-- Products available: {len(product_context)} pH-balancing products found
-- These products work for both low pH (acidic) and high pH (alkaline/salty) soil conditions
-
-RESPONSE GUIDANCE:
-1. START with: "Great news! I found FreshNutrients products that help balance soil pH whether your soil is too acidic (low pH) or too alkaline (high pH)."
-
-2. Present the products clearly explaining their dual-purpose nature:
-   - Mention that these products work for both acidic and alkaline soil conditions
-   - Explain how they help buffer and balance soil pH naturally
-   - Include application instructions and timing
-
-3. OPTIONALLY add education: "Whether your soil shows signs of acidity (stunted growth, nutrient lockout) or alkalinity (salty/crusty appearance), these products will help restore proper pH balance."
-
-4. Include all document links for each product
-5. Use the friendly format from your main instructions
-"""
-                    elif scenario == 'product_direct':
-                        # User asked about a specific product - show that product info immediately
-                        context_guidance = f"""
-📋 PRODUCT DIRECT REQUEST:
-- User requested specific product information
-- Products available: {len(product_context)} matching products found
-
-RESPONSE GUIDANCE:
-1. Present the specific FreshNutrients product(s) they asked about
-2. Include complete product details, benefits, and application instructions
-3. Include all document links for the product
-4. Use the friendly format from your main instructions
-"""
-                    elif scenario == 'crop_only':
-                        # User only provided crop - prompt for more context while showing any available products
-                        context_guidance = f"""
-📋 CROP ONLY PROVIDED:
-- User mentioned crop but no specific problem or application method
-- Products available: {len(product_context)} general crop products found
-- Prompt message: {context_analysis.get('prompt_message', '')}
-
-RESPONSE GUIDANCE:
-1. Show available FreshNutrients products for their crop
-2. Include the prompt message to ask for more specific details
-3. Explain that knowing their specific problem or application method will help provide better recommendations
-4. Use the friendly format from your main instructions
-"""
-                    elif scenario == 'problem_focused':
-                        # User provided problem - show products but prompt for crop for better targeting
-                        context_guidance = f"""
-📋 PROBLEM FOCUSED REQUEST:
-- User specified a problem but no crop
-- Products available: {len(product_context)} problem-solving products found
-- Prompt message: {context_analysis.get('prompt_message', '')}
-
-RESPONSE GUIDANCE:
-1. Present all {len(product_context)} FreshNutrients products that address their problem
-2. Include complete details and application instructions for each product
-3. Include the prompt message to ask for crop information for more targeted recommendations
-4. Use the friendly format from your main instructions
-"""
-                    elif scenario == 'problem_and_crop':
-                        # User provided both problem and crop - perfect context
-                        context_guidance = f"""
-📋 OPTIMAL CONTEXT PROVIDED:
-- User specified both problem and crop
-- Products available: {len(product_context)} targeted products found
-- Information completeness: {context_analysis['completeness_score']:.0%}
-
-RESPONSE GUIDANCE:
-1. Present all {len(product_context)} FreshNutrients products that match their criteria
-2. Include complete details, benefits, and application instructions
-3. Include all document links for each product
-4. If multiple products are suitable, explain the differences to help the user choose
-5. Use the friendly format from your main instructions
-"""
-                    else:
-                        # Other scenarios - application only, insufficient, etc.
-                        missing_info = ", ".join([
-                            param.replace('_', ' ').title() 
-                            for param in context_analysis['missing_params']
-                        ])
-                        prompt_msg = context_analysis.get('prompt_message', 'Could you provide more details about what you need help with?')
-                        
-                        context_guidance = f"""
-📋 CONTEXT ANALYSIS:
-- Scenario: {scenario}
-- Information completeness: {context_analysis['completeness_score']:.0%}
-- Products available: {len(product_context)} matching products found
-- Prompt message: {prompt_msg}
-
-RESPONSE GUIDANCE:
-1. Present available FreshNutrients products that match the user's criteria
-2. Include the prompt message to ask for additional helpful details
-3. Use the friendly format from your main instructions
-4. Include all document links for each product
-"""
-                    user_context_str += f"\n\n{context_guidance}"
-                else:
-                    # No products found - provide helpful guidance based on scenario
-                    scenario = context_analysis.get('scenario', 'insufficient')
-                    prompt_msg = context_analysis.get('prompt_message', 'To provide the best product recommendation, could you tell me what specific problem you\'re trying to solve?')
-                    
-                    context_guidance = f"""
-NO PRODUCTS FOUND - PROVIDE HELPFUL GUIDANCE:
-
-Scenario: {scenario}
-Prompt: {prompt_msg}
-
-Respond with a friendly message that:
-1. Acknowledges their inquiry about farming/soil/plant needs
-2. Uses the specific prompt message to guide them toward providing helpful information
-3. Mentions that FreshNutrients has products for many different crops and problems
-4. Keeps the conversation focused on what they need help with
-
-DO NOT mention technical details, database searches, or system information. Keep it conversational and helpful.
-
-EXAMPLE: "I'd be happy to help you find the right FreshNutrients products! {prompt_msg} FreshNutrients has specialized products to help address various farming challenges."
-"""
-                    user_context_str += f"\n\n{context_guidance}"
-            
-            # Create farming-specific system prompt
-            system_prompt = FarmingPrompts.create_system_prompt(
-                product_context=product_context_str,
-                user_context=user_context_str
-            )
+            system_prompt, context_analysis = self._build_smart_system_prompt(product_context, user_context)
             
             # Get response with context
             response = await self._get_azure_response(message, system_prompt)
             
-            # Reset failure time on success
-            self.last_azure_failure = None
-            
             return {
                 "response": response,
                 "provider": "azure_openai",
@@ -623,7 +837,6 @@ EXAMPLE: "I'd be happy to help you find the right FreshNutrients products! {prom
             import traceback
             logger.error(f"Smart chat response failed: {e}")
             logger.error(f"Stack trace: {traceback.format_exc()}")
-            self.last_azure_failure = datetime.now()
             return {
                 "response": self._get_emergency_response(),
                 "provider": "emergency",
@@ -631,6 +844,35 @@ EXAMPLE: "I'd be happy to help you find the right FreshNutrients products! {prom
                 "error": str(e)
             }
     
+    async def stream_smart_chat_response(
+        self,
+        message: str,
+        product_context: List[Dict[str, Any]] = None,
+        user_context: Dict[str, Any] = None
+    ) -> AsyncIterator[str]:
+        """Stream a smart chat response as text chunks while Azure OpenAI generates it."""
+        if self._get_unavailable_response():
+            yield self._get_emergency_response()
+            return
+        
+        streamed_any = False
+        try:
+            system_prompt, _ = self._build_smart_system_prompt(product_context, user_context)
+            
+            async for chunk in self._stream_azure_response(message, system_prompt):
+                streamed_any = True
+                yield chunk
+            
+            # Close the circuit on success
+            self.circuit_breaker.record_success()
+            
+        except Exception as e:
+            logger.error(f"Streaming smart chat response failed: {e}")
+            self.circuit_breaker.record_failure()
+            # Only fall back to the emergency text if the client hasn't received a partial answer
+            if not streamed_any:
+                yield self._get_emergency_response()
+    
     async def get_intelligent_response(
         self, 
         message: str, 
@@ -638,6 +880,11 @@ EXAMPLE: "I'd be happy to help you find the right FreshNutrients products! {prom
     ) -> Dict[str, Any]:
         """Get intelligent response with automatic context retrieval."""
         
+        # Skip context retrieval entirely when the emergency response is the only possible outcome
+        unavailable = self._get_unavailable_response(probe=False)
+        if unavailable:
+            return unavailable
+        
         if not self.context_engine:
             logger.warning("Context engine not initialized, falling back to basic response")
             return await self.get_chat_response(message)
@@ -668,24 +915,12 @@ EXAMPLE: "I'd be happy to help you find the right FreshNutrients products! {prom
         """Get chat response from Azure OpenAI."""
         
         # Check if Azure OpenAI is available and circuit is closed
-        if not self.azure_available:
-            return {
-                "response": self._get_emergency_response(),
-                "provider": "emergency",
-                "status": "service_unavailable"
-            }
-            
-        if self._is_azure_circuit_open():
-            return {
-                "response": self._get_emergency_response(),
-                "provider": "emergency", 
-                "status": "circuit_breaker_open"
-            }
+        unavailable = self._get_unavailable_response()
+        if unavailable:
+            return unavailable
             
         try:
             response = await self._get_azure_response(message, system_prompt)
-            # Reset failure time on success
-            self.last_azure_failure = None
             return {
                 "response": response,
                 "provider": "azure_openai",
@@ -693,7 +928,6 @@ EXAMPLE: "I'd be happy to help you find the right FreshNutrients products! {prom
             }
         except Exception as e:
             logger.error(f"Azure OpenAI failed: {e}")
-            self.last_azure_failure = datetime.now()
             return {
                 "response": self._get_emergency_response(),
                 "provider": "emergency",
@@ -701,60 +935,122 @@ EXAMPLE: "I'd be happy to help you find the right FreshNutrients products! {prom
             }
         
     async def _get_azure_response(self, message: str, system_prompt: str = None) -> str:
-        """Get response from Azure OpenAI."""
+        """Get response from Azure OpenAI, sharing one call between identical concurrent requests."""
+        key = hashlib.sha256(f"{system_prompt or ''}\0{message}".encode()).digest()
+        
+        request = self._inflight.get(key)
+        if request is None:
+            # Run the call as its own task so a cancelled caller doesn't cancel it for the others
+            request = asyncio.ensure_future(self._request_azure_response(message, system_prompt))
+            self._inflight[key] = request
+            request.add_done_callback(lambda _: self._inflight.pop(key, None))
+            # Mark the exception retrieved in case every caller was cancelled before it finished
+            request.add_done_callback(lambda t: t.cancelled() or t.exception())
+        else:
+            logger.info("Joining in-flight Azure OpenAI request for identical prompt")
+        
+        return await asyncio.shield(request)
+    
+    async def _request_azure_response(self, message: str, system_prompt: str = None) -> str:
+        """Send a chat completion request to Azure OpenAI and record the outcome on the circuit breaker."""
         try:
-            messages = []
-            
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-                
-            messages.append({"role": "user", "content": message})
+            messages = self._build_messages(message, system_prompt)
             
             logger.info(f"Making Azure OpenAI request with {len(messages)} messages")
             
-            response = self.azure_client.chat.completions.create(
+            response = await self.azure_client.chat.completions.create(
                 model=settings.AZURE_OPENAI_MODEL,
                 messages=messages,
                 max_tokens=500,
                 temperature=0.7
             )
             
-            logger.info(f"Azure OpenAI response received: {type(response)}")
-            
-            if response is None:
-                logger.error("Azure OpenAI returned None response")
-                raise Exception("Azure OpenAI returned None response")
-            
-            if not hasattr(response, 'choices') or not response.choices:
-                logger.error("Azure OpenAI response has no choices")
-                raise Exception("Azure OpenAI response has no choices")
-            
-            if len(response.choices) == 0:
-                logger.error("Azure OpenAI response choices list is empty")
-                raise Exception("Azure OpenAI response choices list is empty")
-            
-            first_choice = response.choices[0]
-            if not first_choice or not hasattr(first_choice, 'message'):
-                logger.error("Azure OpenAI response first choice has no message")
-                raise Exception("Azure OpenAI response first choice has no message")
-            
-            if not first_choice.message or not hasattr(first_choice.message, 'content'):
-                logger.error("Azure OpenAI response message has no content attribute")
-                raise Exception("Azure OpenAI response message has no content attribute")
+            try:
+                content = response.choices[0].message.content
+            except (AttributeError, IndexError, TypeError) as e:
+                logger.error(f"Malformed Azure OpenAI response: {e}")
+                raise Exception(f"Malformed Azure OpenAI response: {e}")
             
-            if not first_choice.message.content:
+            if not content:
                 logger.error("Azure OpenAI response message content is empty")
                 raise Exception("Azure OpenAI response message content is empty")
             
-            content = first_choice.message.content
             logger.info(f"Successfully extracted content: {len(content)} characters")
             
+            # Close the circuit on success; recorded once however many callers share this call
+            self.circuit_breaker.record_success()
+            
             return content
             
+        except APITimeoutError as e:
+            # The SDK wraps the underlying httpx timeout; log which phase stalled
+            if isinstance(e.__cause__, httpx.ConnectTimeout):
+                logger.error("Azure OpenAI connect timeout")
+            elif isinstance(e.__cause__, httpx.ReadTimeout):
+                logger.error("Azure OpenAI read timeout")
+            else:
+                logger.error(f"Azure OpenAI request timed out: {str(e)}")
+            self.circuit_breaker.record_failure()
+            raise e
         except Exception as e:
             logger.error(f"Error in _get_azure_response: {str(e)}")
+            self.circuit_breaker.record_failure()
             raise e
         
+    async def _stream_azure_response(self, message: str, system_prompt: str = None) -> AsyncIterator[str]:
+        """Stream response text from Azure OpenAI as it is generated."""
+        messages = self._build_messages(message, system_prompt)
+        
+        logger.info(f"Making streaming Azure OpenAI request with {len(messages)} messages")
+        
+        stream = await self.azure_client.chat.completions.create(
+            model=settings.AZURE_OPENAI_MODEL,
+            messages=messages,
+            max_tokens=500,
+            temperature=0.7,
+            stream=True
+        )
+        
+        async for chunk in stream:
+            # Azure sends a leading chunk with no choices (content filter results)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    @staticmethod
+    def _build_messages(message: str, system_prompt: str = None) -> List[Dict[str, str]]:
+        """Build the chat messages list for an Azure OpenAI request."""
+        messages = []
+        
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+            
+        messages.append({"role": "user", "content": message})
+        return messages
+        
+    def _get_unavailable_response(self, probe: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Return the emergency response dict if Azure OpenAI can't be called, else None.
+        
+        With probe=False the circuit state is only inspected, so a caller that checks
+        early doesn't use up the half-open probe meant for the actual Azure call.
+        """
+        if not self.azure_available:
+            return {
+                "response": self._get_emergency_response(),
+                "provider": "emergency",
+                "status": "service_unavailable"
+            }
+            
+        circuit_closed = self.circuit_breaker.allow_request() if probe else not self._is_azure_circuit_open()
+        if not circuit_closed:
+            return {
+                "response": self._get_emergency_response(),
+                "provider": "emergency", 
+                "status": "circuit_breaker_open"
+            }
+        
+        return None
+        
     def _get_emergency_response(self) -> str:
         """Emergency response when Azure OpenAI service fails."""
         return (
@@ -767,7 +1063,54 @@ EXAMPLE: "I'd be happy to help you find the right FreshNutrients products! {prom
         """Test Azure OpenAI service connectivity for monitoring."""
         if not self.azure_available:
             return {"azure_openai": {"status": "not_configured"}}
+        
+        cached = self._get_cached_connectivity()
+        if cached:
+            return cached
+        
+        # Concurrent probes wait for the one in flight instead of calling Azure themselves
+        async with self._connectivity_lock:
+            cached = self._get_cached_connectivity()
+            if cached:
+                return cached
+            
+            result = await self._probe_connectivity()
+            
+            ttl = self.CONNECTIVITY_TTL_OK if result["status"] == "connected" else self.CONNECTIVITY_TTL_FAILED
+            checked_at = datetime.now()
+            result["timestamp"] = checked_at.isoformat()
+            result["expires"] = (checked_at + timedelta(seconds=ttl)).isoformat()
             
+            response = {"azure_openai": result}
+            self._connectivity_cache = (time.monotonic() + ttl, response)
+            return response
+    
+    def get_last_connectivity(self) -> Dict[str, Any]:
+        """Return the most recent connectivity result without probing Azure (may be stale)."""
+        if not self.azure_available:
+            return {"azure_openai": {"status": "not_configured"}}
+        if self._connectivity_cache:
+            return self._connectivity_cache[1]
+        return {"azure_openai": {"status": "pending"}}
+    
+    async def run_connectivity_probes(self, interval: int = 60):
+        """Background task that refreshes the connectivity result so status endpoints never wait on Azure."""
+        while True:
+            try:
+                if self.azure_available:
+                    await self.test_connectivity()
+            except Exception as e:
+                logger.error(f"Background connectivity probe failed: {e}")
+            await asyncio.sleep(interval)
+    
+    def _get_cached_connectivity(self) -> Optional[Dict[str, Any]]:
+        """Return the cached connectivity result if it hasn't expired."""
+        if self._connectivity_cache and time.monotonic() < self._connectivity_cache[0]:
+            return self._connectivity_cache[1]
+        return None
+    
+    async def _probe_connectivity(self) -> Dict[str, Any]:
+        """Send a minimal prompt to Azure OpenAI and report the outcome."""
         try:
             logger.info("Testing Azure OpenAI connectivity...")
             
@@ -777,19 +1120,15 @@ EXAMPLE: "I'd be happy to help you find the right FreshNutrients products! {prom
             logger.info(f"Test response successful: {test_response[:50]}...")
             
             return {
-                "azure_openai": {
-                    "status": "connected",
-                    "model": settings.AZURE_OPENAI_MODEL,
-                    "test_response": test_response[:100] + "..." if len(test_response) > 100 else test_response
-                }
+                "status": "connected",
+                "model": settings.AZURE_OPENAI_MODEL,
+                "test_response": test_response[:100] + "..." if len(test_response) > 100 else test_response
             }
         except Exception as e:
             logger.error(f"Azure OpenAI connectivity test failed: {str(e)}")
             return {
-                "azure_openai": {
-                    "status": "failed", 
-                    "error": str(e)[:100]  # Limit error message length
-                }
+                "status": "failed", 
+                "error": str(e)[:100]  # Limit error message length
             }
 
 
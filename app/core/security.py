@@ -11,13 +11,16 @@ This module handles:
 
 from fastapi import Request, HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
+import re
 import time
+import uuid
 import hashlib
+import hmac
 import json
-from typing import Dict, Optional
-from collections import defaultdict, deque
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+import asyncio
 import logging
 
 from ..config import settings
@@ -27,90 +30,177 @@ logger = logging.getLogger(__name__)
 # Security configuration
 security = HTTPBearer()
 
-# Rate limiting storage (in production, use Redis)
-rate_limit_storage: Dict[str, deque] = defaultdict(lambda: deque())
+# Rate limiting storage used when REDIS_URL is not configured, e.g. local development
+# Fixed window counters: client_id -> (request count, window start)
+# Split into shards so the cleanup task can sweep one at a time without stalling the event loop
+RATE_LIMIT_SHARDS = 32
+rate_limit_storage: List[Dict[str, Tuple[int, float]]] = [{} for _ in range(RATE_LIMIT_SHARDS)]
 RATE_LIMIT_REQUESTS = 100  # requests per window
 RATE_LIMIT_WINDOW = 3600   # 1 hour in seconds
 
+# Redis socket timeout, and how long to use in-memory limits after a Redis failure before trying it again
+REDIS_TIMEOUT = 0.5
+REDIS_RETRY_COOLDOWN = 30
+
+# 429 response body, encoded once since the limits are fixed at import
+RATE_LIMIT_EXCEEDED_BODY = json.dumps({
+    "error": "Rate limit exceeded",
+    "message": f"Maximum {RATE_LIMIT_REQUESTS} requests per hour allowed",
+    "retry_after": RATE_LIMIT_WINDOW
+}).encode()
+
+# Sliding window check run atomically in Redis: drop expired entries, count, then record the request
+# KEYS[1] = client key, ARGV = now, window, limit, unique member
+REDIS_RATE_LIMIT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. (tonumber(ARGV[1]) - tonumber(ARGV[2])))
+local count = redis.call('ZCARD', KEYS[1])
+if count >= tonumber(ARGV[3]) then
+    return {0, count}
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return {1, count + 1}
+"""
+
+# Content rejected by sanitize_input
+DANGEROUS_PATTERNS = (
+    "<script", "</script>", "javascript:", "data:",
+    "vbscript:", "onload=", "onerror=", "onclick="
+)
+DANGEROUS_CONTENT_RE = re.compile("|".join(re.escape(pattern) for pattern in DANGEROUS_PATTERNS), re.IGNORECASE)
+
+# Conversation IDs: UUIDs or alphanumerics with hyphens/underscores (\Z so a trailing newline doesn't match)
+CONVERSATION_ID_RE = re.compile(r'[a-zA-Z0-9\-_]{1,50}\Z')
+
+# Shared encoder for validate_json_size
+JSON_SIZE_ENCODER = json.JSONEncoder()
+
 # Valid API keys (in production, store in Azure Key Vault)
 VALID_API_KEYS = {
     settings.API_SECRET_KEY,  # Primary key
     "fn-chat-api-key-2025",   # Secondary key for rotation
 }
 
+# Keys are checked by SHA-256 digest with a constant-time comparison
+VALID_API_KEY_DIGESTS = frozenset(hashlib.sha256(key.encode()).digest() for key in VALID_API_KEYS if key)
 
-class SecurityMiddleware(BaseHTTPMiddleware):
-    """Security middleware for HTTPS enforcement and security headers."""
-    
-    async def dispatch(self, request: Request, call_next):
-        # HTTPS enforcement (in production)
-        if settings.ENVIRONMENT == "production" and request.url.scheme != "https":
-            return Response(
-                content="HTTPS required", 
-                status_code=426,
-                headers={"Upgrade": "TLS/1.2"}
-            )
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        return response
 
+# Health check, docs and browser housekeeping paths that skip rate limiting and HTTPS enforcement
+SKIP_PATHS = frozenset({"/", "/health", "/docs", "/openapi.json", "/redoc", "/favicon.ico"})
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware to prevent API abuse."""
+# Headers added to every response when HTTPS enforcement is enabled, pre-encoded for the raw header list
+SECURITY_MIDDLEWARE_HEADERS: List[Tuple[bytes, bytes]] = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+]
+
+
+def requires_https_redirect(request: Request) -> bool:
+    """HTTPS enforcement (in production); health checks and docs stay reachable for tooling."""
+    return (
+        settings.ENVIRONMENT == "production"
+        and request.url.scheme != "https"
+        and request.url.path not in SKIP_PATHS
+    )
+
+
+def https_required_response() -> Response:
+    """Response sent to plain HTTP requests in production."""
+    return Response(
+        content="HTTPS required", 
+        status_code=426,
+        headers={"Upgrade": "TLS/1.2"}
+    )
+
+
+def rate_limit_exceeded_response() -> Response:
+    """Response sent when a client is over its rate limit."""
+    return Response(
+        content=RATE_LIMIT_EXCEEDED_BODY,
+        status_code=429,
+        media_type="application/json"
+    )
+
+
+class RateLimiter:
+    """Per-client request limits, in Redis when configured and in-process otherwise."""
     
-    async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting for health checks
-        if request.url.path in ["/", "/health"]:
-            return await call_next(request)
+    def __init__(self):
+        self.redis = None
+        self.redis_script = None
+        self.redis_retry_at = 0.0  # Monotonic time before which Redis is skipped after a failure
         
-        # Get client identifier
+        # Share limits across workers and instances through Redis when it's configured
+        if settings.REDIS_URL:
+            import redis.asyncio as redis
+            self.redis = redis.from_url(
+                settings.REDIS_URL,
+                socket_timeout=REDIS_TIMEOUT,
+                socket_connect_timeout=REDIS_TIMEOUT
+            )
+            self.redis_script = self.redis.register_script(REDIS_RATE_LIMIT_SCRIPT)
+            logger.info("Rate limiting backed by Redis")
+    
+    @staticmethod
+    def should_skip(request: Request) -> bool:
+        """Skip rate limiting for health checks, docs and CORS preflights."""
+        return request.method == "OPTIONS" or request.url.path in SKIP_PATHS
+    
+    def get_client_id(self, request: Request) -> str:
+        """Identify the client by IP, plus a hash of the API key when one is sent."""
         client_ip = self._get_client_ip(request)
         api_key = self._extract_api_key(request)
-        client_id = f"{client_ip}:{api_key}" if api_key else client_ip
+        # Hashed so the key never ends up in Redis key names, rate limit storage or logs
+        return f"{client_ip}:{hash_api_key(api_key)}" if api_key else client_ip
+    
+    @staticmethod
+    def get_headers(request_count: int) -> List[Tuple[bytes, bytes]]:
+        """Rate limit headers for a response, pre-encoded for the raw header list."""
+        remaining = max(0, RATE_LIMIT_REQUESTS - request_count)
+        reset = int(time.time() + RATE_LIMIT_WINDOW)  # Clients expect epoch time
+        return [
+            (b"x-ratelimit-limit", str(RATE_LIMIT_REQUESTS).encode()),
+            (b"x-ratelimit-remaining", str(remaining).encode()),
+            (b"x-ratelimit-reset", str(reset).encode()),
+        ]
+    
+    async def check(self, client_id: str) -> Tuple[bool, int]:
+        """Record a request for the client and return (allowed, requests in window)."""
+        if self.redis_script and time.monotonic() >= self.redis_retry_at:
+            try:
+                # Wall-clock time here: the window is shared with other hosts
+                current_time = time.time()
+                allowed, request_count = await self.redis_script(
+                    keys=[f"rl:{client_id}"],
+                    args=[current_time, RATE_LIMIT_WINDOW, RATE_LIMIT_REQUESTS, f"{current_time}:{uuid.uuid4().hex}"]
+                )
+                return bool(allowed), int(request_count)
+            except Exception as e:
+                # Back off so an outage costs one timeout and one warning per cooldown, not per request
+                self.redis_retry_at = time.monotonic() + REDIS_RETRY_COOLDOWN
+                logger.warning(f"Redis rate limit check failed, using in-memory limits for {REDIS_RETRY_COOLDOWN}s: {e}")
         
-        # Check rate limit
-        current_time = time.time()
-        client_requests = rate_limit_storage[client_id]
+        # Monotonic time for in-process windows, so clock adjustments can't shift them
+        return self._check_memory_rate_limit(client_id, time.monotonic())
+    
+    def _check_memory_rate_limit(self, client_id: str, current_time: float) -> Tuple[bool, int]:
+        """In-process fixed window rate limit check."""
+        shard = rate_limit_storage[hash(client_id) % RATE_LIMIT_SHARDS]
+        request_count, window_start = shard.get(client_id, (0, current_time))
         
-        # Remove old requests outside the window
-        while client_requests and client_requests[0] < current_time - RATE_LIMIT_WINDOW:
-            client_requests.popleft()
+        # Start a new window once the current one has expired
+        if current_time - window_start >= RATE_LIMIT_WINDOW:
+            request_count, window_start = 0, current_time
         
-        # Check if limit exceeded
-        if len(client_requests) >= RATE_LIMIT_REQUESTS:
-            logger.warning(f"Rate limit exceeded for client: {client_id}")
-            return Response(
-                content=json.dumps({
-                    "error": "Rate limit exceeded",
-                    "message": f"Maximum {RATE_LIMIT_REQUESTS} requests per hour allowed",
-                    "retry_after": RATE_LIMIT_WINDOW
-                }),
-                status_code=429,
-                headers={"Content-Type": "application/json"}
-            )
+        if request_count >= RATE_LIMIT_REQUESTS:
+            return False, request_count
         
         # Add current request
-        client_requests.append(current_time)
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Add rate limit headers
-        remaining = max(0, RATE_LIMIT_REQUESTS - len(client_requests))
-        response.headers["X-RateLimit-Limit"] = str(RATE_LIMIT_REQUESTS)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(int(current_time + RATE_LIMIT_WINDOW))
-        
-        return response
+        shard[client_id] = (request_count + 1, window_start)
+        return True, request_count + 1
     
     def _get_client_ip(self, request: Request) -> str:
         """Extract client IP address."""
@@ -133,6 +223,31 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         return None
 
 
+def sweep_rate_limit_shard(shard: Dict[str, Tuple[int, float]], current_time: float = None) -> int:
+    """Drop rate limit entries for clients idle for two windows. Returns the number removed."""
+    current_time = time.monotonic() if current_time is None else current_time
+    cutoff = current_time - 2 * RATE_LIMIT_WINDOW
+    expired = [client_id for client_id, (_, window_start) in shard.items() if window_start < cutoff]
+    for client_id in expired:
+        del shard[client_id]
+    return len(expired)
+
+
+async def rate_limit_cleanup_task(interval: int = 300):
+    """Background task that periodically sweeps idle rate limit entries."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = 0
+            for shard in rate_limit_storage:
+                removed += sweep_rate_limit_shard(shard)
+                await asyncio.sleep(0)  # Let requests run between shards
+            if removed:
+                logger.debug(f"Swept {removed} idle rate limit entries")
+        except Exception as e:
+            logger.error(f"Rate limit cleanup failed: {e}")
+
+
 async def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """
     Verify API key authentication.
@@ -148,7 +263,7 @@ async def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(sec
     """
     api_key = credentials.credentials
     
-    if not api_key or api_key not in VALID_API_KEYS:
+    if not api_key or not _is_valid_api_key(api_key):
         logger.warning(f"Invalid API key attempt: {api_key[:10]}..." if api_key else "No API key provided")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -160,6 +275,12 @@ async def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(sec
     return api_key
 
 
+def _is_valid_api_key(api_key: str) -> bool:
+    """Compare the key's digest against the valid digests in constant time."""
+    digest = hashlib.sha256(api_key.encode()).digest()
+    return any(hmac.compare_digest(digest, valid_digest) for valid_digest in VALID_API_KEY_DIGESTS)
+
+
 def sanitize_input(text: str, max_length: int = 1000) -> str:
     """
     Sanitize user input to prevent injection attacks.
@@ -187,19 +308,12 @@ def sanitize_input(text: str, max_length: int = 1000) -> str:
             detail=f"Input too long: maximum {max_length} characters allowed"
         )
     
-    # Remove potentially dangerous characters
-    dangerous_patterns = [
-        "<script", "</script>", "javascript:", "data:",
-        "vbscript:", "onload=", "onerror=", "onclick="
-    ]
-    
-    text_lower = text.lower()
-    for pattern in dangerous_patterns:
-        if pattern in text_lower:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid input: potentially dangerous content detected"
-            )
+    # Reject potentially dangerous content (single case-insensitive pass)
+    if DANGEROUS_CONTENT_RE.search(text):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid input: potentially dangerous content detected"
+        )
     
     # Basic sanitization
     sanitized = text.strip()
@@ -233,25 +347,33 @@ class RequestValidator:
             return False
         
         # Allow UUID format or alphanumeric with hyphens
-        import re
-        pattern = r'^[a-zA-Z0-9\-_]{1,50}$'
-        return bool(re.match(pattern, conversation_id))
+        return CONVERSATION_ID_RE.match(conversation_id) is not None
     
     @staticmethod
     def validate_json_size(json_data: dict, max_size_kb: int = 50) -> bool:
         """Validate JSON payload size."""
-        json_str = json.dumps(json_data)
-        size_kb = len(json_str.encode('utf-8')) / 1024
-        return size_kb <= max_size_kb
+        max_bytes = max_size_kb * 1024
+        size = 0
+        
+        # Encode incrementally and stop as soon as the limit is passed
+        # (output is ASCII-only with the default ensure_ascii, so len() is the byte count)
+        for chunk in JSON_SIZE_ENCODER.iterencode(json_data):
+            size += len(chunk)
+            if size > max_bytes:
+                return False
+        return True
 
 
 # Security utilities for other modules
-def get_secure_headers() -> Dict[str, str]:
-    """Get security headers for responses."""
-    return {
-        "X-Content-Type-Options": "nosniff",
-        "X-Frame-Options": "DENY",
-        "X-XSS-Protection": "1; mode=block",
-        "Cache-Control": "no-store, no-cache, must-revalidate",
-        "Pragma": "no-cache"
-    }
+SECURE_HEADERS: Mapping[str, str] = MappingProxyType({
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Cache-Control": "no-store, no-cache, must-revalidate",
+    "Pragma": "no-cache"
+})
+
+
+def get_secure_headers() -> Mapping[str, str]:
+    """Get security headers for responses (read-only, shared between callers)."""
+    return SECURE_HEADERS
@@ -5,31 +5,57 @@ This module initializes the FastAPI application with all necessary
 middleware, routes, and configuration for the FreshNutrients AI chat API.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Path, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import ORJSONResponse, FileResponse
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.staticfiles import StaticFiles
+import asyncio
+import hashlib
 import logging
-import os
-from contextlib import asynccontextmanager
+import pathlib
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
+from typing import Annotated, Any, Dict, List, Optional, Tuple
 
 from .config import settings
 from .models import HealthResponse
 from .core.database import db_manager, chat_log_manager, product_manager
-from .core.llm_service import llm_service
-from .core.security import SecurityMiddleware, RateLimitMiddleware
+from .core.llm_service import create_azure_http_client, llm_service
+from .core.security import (
+    SECURITY_MIDDLEWARE_HEADERS,
+    RateLimiter,
+    https_required_response,
+    rate_limit_cleanup_task,
+    rate_limit_exceeded_response,
+    requires_https_redirect,
+)
+from .utils.helpers import get_cached_probe
+from .utils.logging import setup_queue_logging
 from .utils.monitoring import performance_monitor
 from .api import chat
 from .api import admin
+from .api import debug
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Configure logging (log output is written by a background thread, not the event loop)
+setup_queue_logging()
 logger = logging.getLogger(__name__)
 
+# The log format never shows thread or process details, so don't collect them for every record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+
+# Debug endpoints run live LLM and database calls and expose configuration, so production leaves them out
+DEBUG_ENDPOINTS_ENABLED = settings.ENVIRONMENT != "production"
+
+
+async def _cancel_task(task: asyncio.Task) -> None:
+    """Cancel a background task and wait for it to finish unwinding."""
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -37,31 +63,49 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting FreshNutrients AI Chat API...")
     
-    # Initialize database connection
-    db_initialized = await db_manager.initialize()
-    if db_initialized:
-        logger.info("Database initialized successfully")
-        # Create chat logs table
-        await chat_log_manager.create_chat_logs_table()
-    else:
-        logger.error("Failed to initialize database")
-    
-    # Initialize LLM service
-    llm_initialized = llm_service.initialize(product_manager)
-    if llm_initialized:
-        logger.info("LLM service initialized successfully")
-    else:
-        logger.warning("LLM service initialization failed - check configuration")
-    
-    logger.info("FreshNutrients AI Chat API started successfully")
-    
-    yield
-    
-    # Shutdown
-    logger.info("Shutting down FreshNutrients AI Chat API...")
-    
-    # Close database connections
-    await db_manager.close()
+    # Each resource registers its cleanup as soon as it is acquired, so shutdown
+    # runs in reverse order and still happens if a later startup step fails
+    async with AsyncExitStack() as resources:
+        # Initialize database connection
+        db_initialized = await db_manager.initialize()
+        resources.push_async_callback(db_manager.close)
+        if db_initialized:
+            logger.info("Database initialized successfully")
+            # Create chat logs table
+            await chat_log_manager.create_chat_logs_table()
+        else:
+            logger.error("Failed to initialize database")
+        
+        # One pooled HTTP/2 client for every Azure OpenAI call
+        app.state.azure_http = await resources.enter_async_context(create_azure_http_client())
+        
+        # Initialize LLM service
+        llm_initialized = llm_service.initialize(product_manager, http_client=app.state.azure_http)
+        resources.push_async_callback(llm_service.close)
+        if llm_initialized:
+            logger.info("LLM service initialized successfully")
+        else:
+            logger.warning("LLM service initialization failed - check configuration")
+        
+        # Keep the in-memory rate limit table bounded
+        if settings.ENABLE_RATE_LIMITING:
+            resources.push_async_callback(_cancel_task, asyncio.create_task(rate_limit_cleanup_task()))
+        
+        # Probe Azure OpenAI in the background so /debug/status doesn't make a live call per request.
+        # Each probe is a billed completion, so only run it where /debug/status is served.
+        if DEBUG_ENDPOINTS_ENABLED:
+            resources.push_async_callback(_cancel_task, asyncio.create_task(llm_service.run_connectivity_probes()))
+        
+        # Shared resources for handlers that take them from the request
+        app.state.db = db_manager
+        app.state.llm = llm_service
+        
+        logger.info("FreshNutrients AI Chat API started successfully")
+        
+        yield
+        
+        # Shutdown
+        logger.info("Shutting down FreshNutrients AI Chat API...")
     
     logger.info("FreshNutrients AI Chat API shutdown complete")
 
@@ -71,51 +115,163 @@ app = FastAPI(
     title=settings.API_TITLE,
     version=settings.API_VERSION,
     description="AI-powered chat API for FreshNutrients speciality fertilizers and farming advice",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Mount static files - serve HTML interface files from root directory
-static_path = os.path.join(os.path.dirname(os.path.dirname(__file__)))
-app.mount("/static", StaticFiles(directory=static_path), name="static")
+STATIC_ROOT = pathlib.Path(__file__).resolve().parent.parent
+CHAT_TEST_INTERFACE = STATIC_ROOT / "chat_test_interface.html"
+CHAT_TEST_INTERFACE_EXISTS = CHAT_TEST_INTERFACE.is_file()  # Checked once instead of on every request
+app.mount("/static", StaticFiles(directory=STATIC_ROOT), name="static")
 
 # Route for chat test interface
 @app.get("/chat_test_interface.html")
 async def chat_test_interface():
     """Serve the chat test interface HTML file."""
-    file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "chat_test_interface.html")
-    if os.path.exists(file_path):
-        return FileResponse(file_path)
+    if CHAT_TEST_INTERFACE_EXISTS:
+        return FileResponse(CHAT_TEST_INTERFACE)
     else:
         raise HTTPException(status_code=404, detail="Chat test interface not found")
 
 # Add security middleware (order matters!)
 # Add monitoring middleware first
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
 import time
 
-class MonitoringMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        response_time = time.time() - start_time
+class UnifiedMiddleware:
+    """
+    Rate limiting, HTTPS enforcement, security headers and request timing.
+    
+    A single pure ASGI middleware instead of three BaseHTTPMiddleware layers,
+    each of which adds its own task and memory stream to every request.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self.rate_limiter = RateLimiter() if settings.ENABLE_RATE_LIMITING else None
+        self.security_enabled = settings.ENABLE_HTTPS_REDIRECT
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.perf_counter()
+        request = Request(scope)
+        status_code = 500
+        extra_headers = list(SECURITY_MIDDLEWARE_HEADERS) if self.security_enabled else []
         
-        # Record the request
-        performance_monitor.record_request(
-            endpoint=request.url.path,
-            method=request.method,
-            response_time=response_time,
-            status_code=response.status_code
-        )
+        async def send_with_headers(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if extra_headers:
+                    message = {**message, "headers": [*message.get("headers", []), *extra_headers]}
+            await send(message)
         
-        return response
+        try:
+            # Check rate limit
+            if self.rate_limiter and not self.rate_limiter.should_skip(request):
+                client_id = self.rate_limiter.get_client_id(request)
+                allowed, request_count = await self.rate_limiter.check(client_id)
+                if not allowed:
+                    logger.warning("Rate limit exceeded for client: %s", client_id)
+                    await rate_limit_exceeded_response()(scope, receive, send_with_headers)
+                    return
+                extra_headers.extend(self.rate_limiter.get_headers(request_count))
+            
+            if self.security_enabled and requires_https_redirect(request):
+                await https_required_response()(scope, receive, send_with_headers)
+                return
+            
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            # Record the request
+            performance_monitor.record_request(
+                endpoint=scope["path"],
+                method=scope["method"],
+                response_time=time.perf_counter() - start_time,
+                status_code=status_code
+            )
 
-app.add_middleware(MonitoringMiddleware)
+# GET endpoints whose response depends only on the path and query string
+SINGLE_FLIGHT_PREFIXES = ("/api/products/", "/api/crops", "/debug/test-")
 
-if settings.ENABLE_HTTPS_REDIRECT:
-    app.add_middleware(SecurityMiddleware)
 
-if settings.ENABLE_RATE_LIMITING:
-    app.add_middleware(RateLimitMiddleware)
+class SingleFlightMiddleware:
+    """
+    Share one execution between identical concurrent GET requests.
+    
+    Pure ASGI, so requests outside SINGLE_FLIGHT_PREFIXES go straight to the
+    wrapped app without being buffered.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self._inflight: Dict[Tuple[str, bytes, bytes], asyncio.Future] = {}
+    
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(SINGLE_FLIGHT_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        # If-None-Match is part of the key so a 304 is only shared with matching validators
+        if_none_match = next((value for name, value in scope["headers"] if name == b"if-none-match"), b"")
+        key = (scope["path"], scope["query_string"], if_none_match)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                result = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The request we joined didn't produce a response to share, so run our own
+                await self.app(scope, receive, send)
+                return
+            await self._replay(result, send)
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        start_message = None
+        body = []
+        
+        async def send_and_capture(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_and_capture)
+            if start_message is not None:
+                future.set_result((start_message["status"], list(start_message.get("headers", [])), b"".join(body)))
+        finally:
+            self._inflight.pop(key, None)
+            # Only a complete response is shared; after an error, a disconnect or no response at all
+            # the waiting requests run their own instead of inheriting this request's failure
+            if not future.done():
+                future.cancel()
+    
+    @staticmethod
+    async def _replay(result: Tuple[int, List[Tuple[bytes, bytes]], bytes], send) -> None:
+        """Send a buffered status, raw header list and body as a fresh response."""
+        status, headers, body = result
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+# Innermost, so per-client rate limit and security headers are still added to each response
+app.add_middleware(SingleFlightMiddleware)
+app.add_middleware(UnifiedMiddleware)
 
 # Add trusted host middleware for production
 # Temporarily disabled for Railway debugging
@@ -138,8 +294,8 @@ app.add_middleware(
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler for unhandled errors."""
-    logger.error(f"Unhandled error: {exc}")
-    return JSONResponse(
+    logger.error("Unhandled error: %s", exc)
+    return ORJSONResponse(
         status_code=500,
         content={"error": "Internal server error", "detail": str(exc)}
     )
@@ -158,10 +314,20 @@ async def root():
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint for monitoring."""
+    # Returning a response directly skips FastAPI re-validating the model on every probe
+    return ORJSONResponse(await get_cached_probe("health", _check_health, settings.HEALTH_CACHE_TTL))
+
+
+async def _check_health() -> Dict[str, Any]:
+    """Check database and LLM service status, serialized as a HealthResponse."""
     try:
-        # Check database connection
-        db_info = await db_manager.get_database_info()
-        db_connected = db_info.get("status", "unknown") == "connected"
+        # Check database connection, bounded so a stalled database reports fast
+        try:
+            db_info = await asyncio.wait_for(db_manager.get_database_info(), timeout=settings.HEALTH_PROBE_TIMEOUT)
+            db_connected = db_info.get("status", "unknown") == "connected"
+        except asyncio.TimeoutError:
+            logger.warning("Database health probe timed out after %ss", settings.HEALTH_PROBE_TIMEOUT)
+            db_connected = False
         
         # Check LLM service status
         llm_configured = llm_service.azure_available
@@ -184,95 +350,45 @@ async def health_check():
             circuit_breaker_open=circuit_breaker_open,
             last_azure_failure=last_failure,
             version=settings.API_VERSION
-        )
+        ).model_dump(mode="json")
         
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
+        logger.error("Health check failed: %s", e)
         raise HTTPException(status_code=503, detail="Service unavailable")
 
 
-@app.get("/debug/env")
-async def debug_environment():
-    """Check environment configuration for debugging."""
-    return {
-        "environment": settings.ENVIRONMENT,
-        "azure_sql_configured": settings.is_azure_sql_configured,
-        "azure_openai_configured": settings.is_azure_openai_configured,
-        "azure_sql_server": settings.AZURE_SQL_SERVER,
-        "cors_origins": settings.ALLOWED_ORIGINS,
-        "port": settings.API_PORT
-    }
+# Query validation shared by the product endpoints (enforced by FastAPI before the handler runs)
+SearchQuery = Annotated[str, Query(min_length=2, max_length=200)]
+SearchLimit = Annotated[int, Query(ge=1, le=50)]  # Capped for performance
 
 
-@app.get("/debug/db-test")
-async def debug_database_connection():
-    """Test database connection with detailed error info."""
-    try:
-        db_info = await db_manager.get_database_info()
-        return {
-            "status": "success",
-            "database_info": db_info,
-            "connection_string_format": f"mssql+pymssql://{settings.AZURE_SQL_USERNAME}:***@{settings.AZURE_SQL_SERVER}/{settings.AZURE_SQL_DATABASE}"
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "error_type": type(e).__name__,
-            "error_message": str(e),
-            "connection_string_format": f"mssql+pymssql://{settings.AZURE_SQL_USERNAME}:***@{settings.AZURE_SQL_SERVER}/{settings.AZURE_SQL_DATABASE}"
-        }
+# Product and crop data changes rarely, so let clients revalidate instead of re-downloading
+CACHEABLE_CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=60"
 
 
-# Development monitoring endpoints (minimal set)
-@app.get("/debug/status")
-async def debug_status():
-    """Essential system status for development monitoring."""
-    try:
-        # Get basic system health
-        db_info = await db_manager.get_database_info()
-        llm_results = await llm_service.test_connectivity()
-        
-        return {
-            "timestamp": "2025-07-11",
-            "database": {
-                "status": db_info.get("status"),
-                "server": settings.AZURE_SQL_SERVER
-            },
-            "llm_service": llm_results,
-            "environment": settings.ENVIRONMENT,
-            "circuit_breaker_open": llm_service._is_azure_circuit_open(),
-            "last_failure": llm_service.last_azure_failure.isoformat() if llm_service.last_azure_failure else None
-        }
-    except Exception as e:
-        logger.error(f"Debug status failed: {e}")
-        return {"error": str(e)}
+def _render_with_etag(content: Dict[str, Any]) -> Tuple[bytes, str]:
+    """Serialize content once and derive its ETag from the bytes."""
+    body = ORJSONResponse(content).body
+    return body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
 
 
-@app.post("/debug/reset-circuit-breaker")
-async def reset_circuit_breaker():
-    """Reset the Azure OpenAI circuit breaker."""
-    try:
-        llm_service.reset_circuit_breaker()
-        return {
-            "status": "success",
-            "message": "Circuit breaker reset successfully",
-            "circuit_breaker_open": llm_service._is_azure_circuit_open()
-        }
-    except Exception as e:
-        logger.error(f"Circuit breaker reset failed: {e}")
-        return {"error": str(e)}
+def _etag_response(request: Request, body: bytes, etag: str) -> Response:
+    """Return a rendered JSON body with its ETag, or an empty 304 if the client already has it."""
+    headers = {"ETag": etag, "Cache-Control": CACHEABLE_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in if_none_match or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Rendered /api/crops response, reused until CROPS_CACHE_TTL expires
+_crops_cache: Optional[Tuple[float, bytes, str]] = None  # (monotonic time, body, ETag)
 
 
 @app.get("/api/products/search")
-async def search_products_by_name(q: str, limit: int = 10):
+async def search_products_by_name(q: SearchQuery, limit: SearchLimit = 10):
     """Search for products by product name."""
     try:
-        if not q or len(q.strip()) < 2:
-            return {"error": "Query must be at least 2 characters long"}
-        
-        if limit > 50:
-            limit = 50  # Cap the limit for performance
-        
         # Search by product name
         results = await product_manager.search_products_by_name(q.strip(), limit)
         
@@ -284,20 +400,14 @@ async def search_products_by_name(q: str, limit: int = 10):
         }
         
     except Exception as e:
-        logger.error(f"Product search by name failed: {e}")
+        logger.error("Product search by name failed: %s", e)
         return {"error": str(e)}
 
 
 @app.get("/api/products/search-by-crop")
-async def search_products_by_crop(q: str, limit: int = 10):
+async def search_products_by_crop(q: SearchQuery, limit: SearchLimit = 10):
     """Search for products by crop type."""
     try:
-        if not q or len(q.strip()) < 2:
-            return {"error": "Query must be at least 2 characters long"}
-        
-        if limit > 50:
-            limit = 50  # Cap the limit for performance
-        
         # Search by crop (existing functionality)
         results = await product_manager.search_products(q.strip(), limit)
         
@@ -309,215 +419,49 @@ async def search_products_by_crop(q: str, limit: int = 10):
         }
         
     except Exception as e:
-        logger.error(f"Product search by crop failed: {e}")
+        logger.error("Product search by crop failed: %s", e)
         return {"error": str(e)}
 
 
 @app.get("/api/products/{product_name}")
-async def get_product_by_name(product_name: str):
+async def get_product_by_name(request: Request, product_name: Annotated[str, Path(min_length=2, max_length=200)]):
     """Get a specific product by exact name."""
     try:
-        if not product_name or len(product_name.strip()) < 2:
-            return {"error": "Product name must be at least 2 characters long"}
-        
         product = await product_manager.get_product_by_name(product_name.strip())
         
         if product:
-            return {
+            return _etag_response(request, *_render_with_etag({
                 "product_name": product_name.strip(),
                 "product": product
-            }
+            }))
         else:
             return {"error": "Product not found"}
         
     except Exception as e:
-        logger.error(f"Get product by name failed: {e}")
+        logger.error("Get product by name failed: %s", e)
         return {"error": str(e)}
 
 
 @app.get("/api/crops")
-async def get_all_crops():
+async def get_all_crops(request: Request):
     """Get all available crop types."""
+    global _crops_cache
     try:
-        crops = await product_manager.get_crops()
-        
-        return {
-            "crops_count": len(crops),
-            "crops": sorted(crops)  # Sort alphabetically
-        }
-        
-    except Exception as e:
-        logger.error(f"Get crops failed: {e}")
-        return {"error": str(e)}
-
-
-@app.get("/debug/test-smart-chat")
-async def test_smart_chat():
-    """Test the new smart chat functionality with realistic scenarios."""
-    try:
-        scenarios = [
-            {
-                "name": "insufficient_info",
-                "message": "What fertilizer should I use for my Grass Pastures?",
-                "context": {"crop_type": "Grass"},  # Missing application type and problem
-                "description": "Basic question without enough detail"
-            },
-            {
-                "name": "specific_request",
-                "message": "I need a soil fertilizer for my tobacco to help with soil salinity",
-                "context": {
-                    "crop_type": "Field Tobacco", 
-                    "application_type": "Soil",
-                    "problem": "Soil Salinity",
-                    "growth_stage": "Flowering"
-                },
-                "description": "Detailed request with all required parameters"
-            },
-            {
-                "name": "soil_application",
-                "message": "What soil fertilizer do you recommend for potato crops to improve fertilizer efficiency?",
-                "context": {
-                    "crop_type": "Potatoes",
-                    "application_type": "Soil", 
-                    "problem": "Fertilizer Efficiency"
-                },
-                "description": "Specific soil application request"
-            }
-        ]
-        
-        results = []
-        for scenario in scenarios:
-            # Use criteria-based search for more accurate product matching
-            context = scenario["context"]
-            products = await product_manager.search_products_by_criteria(
-                crop=context.get("crop_type"),
-                application_type=context.get("application_type"),
-                problem=context.get("problem")
-                # No limit - get all matching products
-            )
-            
-            # If no specific matches found, fall back to crop search
-            if not products:
-                products = await product_manager.search_products(context["crop_type"])
-            
-            # Remove duplicates by product name while preserving order
-            unique_products = []
-            seen_product_names = set()
-            for product in products:
-                product_name = product.get("product_name")
-                if product_name and product_name not in seen_product_names:
-                    unique_products.append(product)
-                    seen_product_names.add(product_name)
-            
-            products = unique_products
-            
-            # Get AI response
-            result = await llm_service.get_smart_chat_response(
-                message=scenario["message"],
-                product_context=products,
-                user_context=scenario["context"]
-            )
-            
-            results.append({
-                "scenario": scenario["name"],
-                "description": scenario["description"],
-                "message": scenario["message"],
-                "context": scenario["context"],
-                "products_available": len(products),
-                "search_method": "criteria" if products else "crop_fallback",
-                "product_names": [p.get("product_name") for p in products[:5]],  # Show first 5 product names
-                "ai_response": result.get("response", "No response"),  # No truncation
-                "status": result.get("status"),
-                "context_analysis": result.get("context_used", {}).get("context_analysis", {})
+        if _crops_cache is None or time.monotonic() - _crops_cache[0] >= settings.CROPS_CACHE_TTL:
+            crops = await product_manager.get_crops()
+            body, etag = _render_with_etag({
+                "crops_count": len(crops),
+                "crops": sorted(crops)  # Sort alphabetically, once per cache fill
             })
+            if not crops:
+                # get_crops returns an empty list on database errors, so don't keep it around
+                return _etag_response(request, body, etag)
+            _crops_cache = (time.monotonic(), body, etag)
         
-        return {
-            "test": "smart_chat_realistic_scenarios",
-            "total_scenarios": len(scenarios),
-            "scenarios": results,
-            "note": "This demonstrates how the AI handles different levels of detail in user requests"
-        }
-        
-    except Exception as e:
-        logger.error(f"Smart chat test failed: {e}")
-        return {"error": str(e)}
-
-
-@app.get("/debug/test-intelligent-chat")
-async def test_intelligent_chat():
-    """Test the intelligent chat with automatic context retrieval."""
-    try:
-        # Test message
-        test_message = "I need help with fertilizing my potato crop. What do you recommend?"
-        
-        # User context
-        user_context = {
-            "crop_type": "Potatoes",
-            "location": "Western Cape, South Africa",
-            "growth_stage": "Tuber development"
-        }
-        
-        # Get intelligent response (context automatically retrieved)
-        result = await llm_service.get_intelligent_response(
-            message=test_message,
-            user_context=user_context
-        )
-        
-        return {
-            "test": "intelligent_chat_auto_context",
-            "message": test_message,
-            "user_context": user_context,
-            "result": result
-        }
-        
-    except Exception as e:
-        logger.error(f"Intelligent chat test failed: {e}")
-        return {"error": str(e)}
-
-
-@app.get("/debug/test-conversation")
-async def test_conversation():
-    """Test conversation with different farming scenarios."""
-    try:
-        test_scenarios = [
-            {
-                "message": "What NPK ratio should I use for my tomatoes?",
-                "context": {"crop_type": "Tomatoes", "growth_stage": "Flowering"}
-            },
-            {
-                "message": "My lettuce plants have yellowing leaves. What should I do?",
-                "context": {"crop_type": "Lettuce", "problem": "Yellowing leaves"}
-            },
-            {
-                "message": "I need organic fertilizer for vegetables",
-                "context": {"crop_type": "Vegetables", "preference": "Organic"}
-            }
-        ]
-        
-        results = []
-        for i, scenario in enumerate(test_scenarios, 1):
-            result = await llm_service.get_intelligent_response(
-                message=scenario["message"],
-                user_context=scenario["context"]
-            )
-            
-            results.append({
-                "scenario": i,
-                "message": scenario["message"],
-                "context": scenario["context"],
-                "response": result.get("response", "No response")[:200] + "..." if len(result.get("response", "")) > 200 else result.get("response", "No response"),
-                "status": result.get("status"),
-                "products_used": result.get("context_used", {}).get("products_count", 0)
-            })
-        
-        return {
-            "test": "conversation_scenarios",
-            "total_scenarios": len(test_scenarios),
-            "results": results
-        }
+        return _etag_response(request, _crops_cache[1], _crops_cache[2])
         
     except Exception as e:
-        logger.error(f"Conversation test failed: {e}")
+        logger.error("Get crops failed: %s", e)
         return {"error": str(e)}
 
 
@@ -526,3 +470,7 @@ app.include_router(chat.router)
 
 # Admin and monitoring endpoints - Phase 5.2 implementation
 app.include_router(admin.router)
+
+# Debug endpoints - not mounted in production
+if DEBUG_ENDPOINTS_ENABLED:
+    app.include_router(debug.router)
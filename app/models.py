@@ -7,14 +7,14 @@ ensuring type safety and automatic validation.
 
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 import uuid
 
 
 class HealthResponse(BaseModel):
     """Health check response model."""
     status: str = Field(..., description="Service status")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Health check timestamp")
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="Health check timestamp")
     version: str = Field(..., description="API version")
     database_connected: bool = Field(..., description="Database connection status")
     llm_configured: bool = Field(..., description="LLM service configuration status")
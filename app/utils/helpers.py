@@ -2,10 +2,17 @@
 Utility helper functions for the FreshNutrients AI Chat API.
 """
 
+import asyncio
+import time
 import uuid
-from typing import Optional, Dict, Any
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 from datetime import datetime
 
+# Health probe results, cached briefly so bursts of load balancer probes collapse into one real check
+_probe_cache: Dict[str, Tuple[float, Any]] = {}  # probe name -> (monotonic time, result)
+_probe_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
 
 def generate_conversation_id() -> str:
     """
@@ -77,3 +84,30 @@ def sanitize_user_input(text: str) -> str:
     """
     # Basic sanitization - can be expanded
     return text.strip()[:1000]  # Limit length and trim whitespace
+
+
+async def get_cached_probe(name: str, probe: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+    """
+    Return a recent result for the named probe, running it at most once per ttl.
+    
+    Args:
+        name: Cache key for the probe
+        probe: Coroutine function performing the real check
+        ttl: Seconds a result is reused
+        
+    Returns:
+        The cached or freshly computed probe result
+    """
+    cached = _probe_cache.get(name)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    
+    async with _probe_locks[name]:
+        # Another request may have refreshed the result while we waited for the lock
+        cached = _probe_cache.get(name)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        
+        result = await probe()
+        _probe_cache[name] = (time.monotonic(), result)
+        return result
@@ -5,11 +5,16 @@ This module provides centralized logging configuration
 for the FreshNutrients AI Chat API.
 """
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 from ..config import settings
 
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
 
 def setup_logging(level: Optional[str] = None) -> None:
     """
@@ -21,9 +26,7 @@ def setup_logging(level: Optional[str] = None) -> None:
     log_level = level or settings.LOG_LEVEL
     
     # Create formatter
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
+    formatter = logging.Formatter(LOG_FORMAT)
     
     # Set up console handler
     console_handler = logging.StreamHandler(sys.stdout)
@@ -39,6 +42,37 @@ def setup_logging(level: Optional[str] = None) -> None:
     logging.getLogger("fastapi").setLevel(logging.INFO)
 
 
+def setup_queue_logging(level: Optional[str] = None) -> Optional[QueueListener]:
+    """
+    Send log records through a queue so handler output runs on a background thread.
+    
+    Like logging.basicConfig, this does nothing if the root logger already has handlers.
+    
+    Args:
+        level: Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        
+    Returns:
+        The started listener, or None if logging was already configured
+    """
+    root_logger = logging.getLogger()
+    if root_logger.hasHandlers():
+        return None
+    
+    # Callers only enqueue; the listener thread formats and writes to stderr
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    
+    root_logger.setLevel(getattr(logging, (level or settings.LOG_LEVEL).upper()))
+    root_logger.addHandler(QueueHandler(log_queue))
+    listener.start()
+    
+    # Flush whatever is still queued when the process exits
+    atexit.register(listener.stop)
+    return listener
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance with the specified name.
@@ -11,10 +11,13 @@ This module provides:
 import time
 import logging
 import json
+from bisect import bisect_right
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
-from dataclasses import dataclass, asdict
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, asdict, field
+from functools import lru_cache
+from itertools import islice
 import psutil
 import asyncio
 
@@ -23,7 +26,18 @@ from ..config import settings
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@lru_cache(maxsize=1)
+def _now_for_tick(tick: int) -> datetime:
+    """Wall-clock time for a 10 ms tick, built once and shared by every caller within it."""
+    return datetime.now()
+
+
+def _cached_now() -> datetime:
+    """Current wall-clock time at 10 ms resolution for metric timestamps."""
+    return _now_for_tick(int(time.time() * 100))
+
+
+@dataclass(slots=True)  # No per-instance __dict__; up to 10k of these are kept
 class PerformanceMetric:
     """Performance metric data structure."""
     timestamp: datetime
@@ -48,14 +62,138 @@ class SystemHealth:
     error_rate: float
 
 
+@dataclass
+class UsageBucket:
+    """Request counts for one clock hour."""
+    hour: int  # Hours since the epoch
+    total: int = 0
+    endpoints: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)  # "{status}_{endpoint}" -> count
+
+
+# Per-endpoint rolling statistics cover at most this many requests over this many hours
+ENDPOINT_STATS_CAPACITY = 1000
+ENDPOINT_STATS_HOURS = 24
+
+# Distinct endpoints with rolling statistics (every product name is its own path)
+MAX_TRACKED_ENDPOINTS = 1000
+
+# Hourly usage buckets kept for get_usage_analytics (one extra for the partial current hour)
+USAGE_BUCKET_HOURS = 24
+
+
+class RollingStats:
+    """Sliding window of response times with O(1) count, mean, variance, min, max and status counts."""
+    
+    def __init__(self, capacity: int = ENDPOINT_STATS_CAPACITY, max_age: float = ENDPOINT_STATS_HOURS * 3600):
+        self.capacity = capacity
+        self.max_age = max_age
+        self._samples: deque = deque()  # (sequence, monotonic time, response time, status code)
+        self._min: deque = deque()  # (sequence, response time), increasing response times
+        self._max: deque = deque()  # (sequence, response time), decreasing response times
+        self._next_seq = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self.status_codes: Counter = Counter()
+        self.error_count = 0
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def append(self, response_time: float, status_code: int, now: Optional[float] = None) -> None:
+        """Add a sample, evicting the oldest one once the window is full."""
+        now = time.monotonic() if now is None else now
+        seq = self._next_seq
+        self._next_seq += 1
+        
+        self._samples.append((seq, now, response_time, status_code))
+        self._sum += response_time
+        self._sum_sq += response_time * response_time
+        self.status_codes[status_code] += 1
+        if status_code >= 400:
+            self.error_count += 1
+        
+        # Older samples that can never be the minimum/maximum again are dropped from the candidates
+        while self._min and self._min[-1][1] >= response_time:
+            self._min.pop()
+        self._min.append((seq, response_time))
+        while self._max and self._max[-1][1] <= response_time:
+            self._max.pop()
+        self._max.append((seq, response_time))
+        
+        self.evict(now)
+    
+    def evict(self, now: Optional[float] = None) -> None:
+        """Drop samples beyond capacity or older than max_age."""
+        cutoff = (time.monotonic() if now is None else now) - self.max_age
+        while self._samples and (len(self._samples) > self.capacity or self._samples[0][1] < cutoff):
+            seq, _, response_time, status_code = self._samples.popleft()
+            self._sum -= response_time
+            self._sum_sq -= response_time * response_time
+            self.status_codes[status_code] -= 1
+            if not self.status_codes[status_code]:
+                del self.status_codes[status_code]
+            if status_code >= 400:
+                self.error_count -= 1
+            if self._min[0][0] == seq:
+                self._min.popleft()
+            if self._max[0][0] == seq:
+                self._max.popleft()
+    
+    @property
+    def is_full(self) -> bool:
+        """Whether samples may have been dropped for capacity rather than age."""
+        return len(self._samples) >= self.capacity
+    
+    @property
+    def last_seen(self) -> float:
+        return self._samples[-1][1] if self._samples else 0.0
+    
+    @property
+    def mean(self) -> float:
+        return self._sum / len(self._samples) if self._samples else 0.0
+    
+    @property
+    def variance(self) -> float:
+        if not self._samples:
+            return 0.0
+        # Clamp the rounding error left by subtracting evicted samples
+        return max(self._sum_sq / len(self._samples) - self.mean ** 2, 0.0)
+    
+    @property
+    def min(self) -> float:
+        return self._min[0][1] if self._min else 0.0
+    
+    @property
+    def max(self) -> float:
+        return self._max[0][1] if self._max else 0.0
+    
+    @property
+    def error_rate(self) -> float:
+        return self.error_count / len(self._samples) if self._samples else 0.0
+
+
 class PerformanceMonitor:
     """Performance monitoring and metrics collection."""
     
     def __init__(self):
         self.metrics: deque = deque(maxlen=10000)  # Keep last 10k metrics
         self.error_count = defaultdict(int)
-        self.endpoint_stats = defaultdict(list)
+        self.endpoint_stats: Dict[str, RollingStats] = {}
+        self.recent_stats = RollingStats(capacity=100, max_age=float("inf"))  # Last 100 requests overall
+        self.usage_buckets: deque = deque(maxlen=USAGE_BUCKET_HOURS + 1)
         self.start_time = datetime.now()
+        
+        # Prime the CPU counter so later non-blocking reads report usage since the previous call
+        psutil.cpu_percent(interval=None)
+    
+    def clear(self):
+        """Reset all collected metrics."""
+        self.metrics.clear()
+        self.error_count.clear()
+        self.endpoint_stats.clear()
+        self.recent_stats = RollingStats(capacity=100, max_age=float("inf"))
+        self.usage_buckets.clear()
     
     def record_request(
         self,
@@ -69,7 +207,7 @@ class PerformanceMonitor:
     ):
         """Record a request metric."""
         metric = PerformanceMetric(
-            timestamp=datetime.now(),
+            timestamp=_cached_now(),
             endpoint=endpoint,
             method=method,
             response_time=response_time,
@@ -80,11 +218,27 @@ class PerformanceMonitor:
         )
         
         self.metrics.append(metric)
-        self.endpoint_stats[endpoint].append(response_time)
+        stats = self.endpoint_stats.get(endpoint)
+        if stats is None:
+            if len(self.endpoint_stats) >= MAX_TRACKED_ENDPOINTS:
+                self._prune_endpoint_stats()
+            stats = self.endpoint_stats[endpoint] = RollingStats()
+        stats.append(response_time, status_code)
+        self.recent_stats.append(response_time, status_code)
+        
+        # Count usage in the current hour's bucket
+        hour = int(time.time() // 3600)
+        if not self.usage_buckets or self.usage_buckets[-1].hour != hour:
+            self.usage_buckets.append(UsageBucket(hour))
+        bucket = self.usage_buckets[-1]
+        bucket.total += 1
+        bucket.endpoints[endpoint] += 1
         
         # Track errors
         if status_code >= 400:
-            self.error_count[f"{status_code}_{endpoint}"] += 1
+            error_key = f"{status_code}_{endpoint}"
+            self.error_count[error_key] += 1
+            bucket.errors[error_key] += 1
         
         # Log performance issues
         if response_time > 5.0:  # Slow response
@@ -93,34 +247,63 @@ class PerformanceMonitor:
         if status_code >= 500:  # Server error
             logger.error(f"Server error: {endpoint} returned {status_code}: {error_message}")
     
+    def _prune_endpoint_stats(self):
+        """Drop expired endpoints, then the least recently seen ones, to keep room for new paths."""
+        now = time.monotonic()
+        for endpoint, stats in list(self.endpoint_stats.items()):
+            stats.evict(now)
+            if not stats:
+                del self.endpoint_stats[endpoint]
+        
+        # Prune down to 90% so this runs at most once per hundred new endpoints
+        excess = len(self.endpoint_stats) - MAX_TRACKED_ENDPOINTS * 9 // 10
+        if excess > 0:
+            least_recent = sorted(self.endpoint_stats, key=lambda endpoint: self.endpoint_stats[endpoint].last_seen)
+            for endpoint in least_recent[:excess]:
+                del self.endpoint_stats[endpoint]
+    
     def get_system_health(self) -> SystemHealth:
         """Get current system health metrics."""
         # CPU and memory usage
-        cpu_percent = psutil.cpu_percent(interval=1)
+        # Non-blocking: a sampling interval would sleep the event loop thread for that long
+        cpu_percent = psutil.cpu_percent(interval=None)
         memory = psutil.virtual_memory()
         disk = psutil.disk_usage('/')
         
-        # Calculate average response time (last 100 requests)
-        recent_metrics = list(self.metrics)[-100:]
-        if recent_metrics:
-            avg_response_time = sum(m.response_time for m in recent_metrics) / len(recent_metrics)
-            error_rate = sum(1 for m in recent_metrics if m.status_code >= 400) / len(recent_metrics)
-        else:
-            avg_response_time = 0.0
-            error_rate = 0.0
-        
+        # Average response time and error rate over the last 100 requests, kept up to date by record_request
         return SystemHealth(
-            timestamp=datetime.now(),
+            timestamp=_cached_now(),
             cpu_percent=cpu_percent,
             memory_percent=memory.percent,
             disk_percent=disk.percent,
-            active_connections=len(recent_metrics),
-            response_time_avg=avg_response_time,
-            error_rate=error_rate
+            active_connections=len(self.recent_stats),
+            response_time_avg=self.recent_stats.mean,
+            error_rate=self.recent_stats.error_rate
         )
     
     def get_endpoint_stats(self, endpoint: str, hours: int = 24) -> Dict[str, Any]:
         """Get statistics for a specific endpoint."""
+        if hours == ENDPOINT_STATS_HOURS:
+            # The rolling window covers exactly this period; other periods scan the metrics
+            stats = self.endpoint_stats.get(endpoint)
+            if stats is not None:
+                stats.evict()
+            if not stats:
+                return {"error": "No data found for endpoint"}
+            
+            # A full window may have dropped samples still inside the period, so count those by scanning
+            if not stats.is_full:
+                return {
+                    "endpoint": endpoint,
+                    "total_requests": len(stats),
+                    "avg_response_time": stats.mean,
+                    "min_response_time": stats.min,
+                    "max_response_time": stats.max,
+                    "response_time_stddev": stats.variance ** 0.5,
+                    "error_rate": stats.error_rate,
+                    "status_code_distribution": {str(code): count for code, count in stats.status_codes.items()}
+                }
+        
         cutoff_time = datetime.now() - timedelta(hours=hours)
         endpoint_metrics = [
             m for m in self.metrics 
@@ -131,49 +314,66 @@ class PerformanceMonitor:
             return {"error": "No data found for endpoint"}
         
         response_times = [m.response_time for m in endpoint_metrics]
-        status_codes = [m.status_code for m in endpoint_metrics]
+        status_codes = Counter(m.status_code for m in endpoint_metrics)
+        avg_response_time = sum(response_times) / len(response_times)
         
         return {
             "endpoint": endpoint,
             "total_requests": len(endpoint_metrics),
-            "avg_response_time": sum(response_times) / len(response_times),
+            "avg_response_time": avg_response_time,
             "min_response_time": min(response_times),
             "max_response_time": max(response_times),
-            "error_rate": sum(1 for code in status_codes if code >= 400) / len(status_codes),
-            "status_code_distribution": dict(defaultdict(int, 
-                {str(code): status_codes.count(code) for code in set(status_codes)}
-            ))
+            "response_time_stddev": (sum((t - avg_response_time) ** 2 for t in response_times) / len(response_times)) ** 0.5,
+            "error_rate": sum(count for code, count in status_codes.items() if code >= 400) / len(endpoint_metrics),
+            "status_code_distribution": {str(code): count for code, count in status_codes.items()}
         }
     
     def get_usage_analytics(self, hours: int = 24) -> Dict[str, Any]:
         """Get usage analytics for the specified time period."""
+        if hours <= USAGE_BUCKET_HOURS:
+            return self._get_bucketed_usage_analytics(hours)
+        
         cutoff_time = datetime.now() - timedelta(hours=hours)
         recent_metrics = [m for m in self.metrics if m.timestamp > cutoff_time]
         
         if not recent_metrics:
             return {"error": "No data found for time period"}
         
-        # Endpoint usage
-        endpoint_usage = defaultdict(int)
-        for metric in recent_metrics:
-            endpoint_usage[metric.endpoint] += 1
+        # Endpoint usage, hourly distribution and top errors, each counted in C by Counter
+        endpoint_usage = Counter(m.endpoint for m in recent_metrics)
+        hourly_usage = Counter(m.timestamp.hour for m in recent_metrics)
+        error_summary = Counter(f"{m.status_code}_{m.endpoint}" for m in recent_metrics if m.status_code >= 400)
         
-        # Hourly distribution
-        hourly_usage = defaultdict(int)
-        for metric in recent_metrics:
-            hour = metric.timestamp.hour
-            hourly_usage[hour] += 1
+        return {
+            "time_period_hours": hours,
+            "total_requests": len(recent_metrics),
+            "unique_endpoints": len(endpoint_usage),
+            "endpoint_usage": dict(endpoint_usage),
+            "hourly_distribution": dict(hourly_usage),
+            "error_summary": dict(error_summary),
+            "uptime_hours": (datetime.now() - self.start_time).total_seconds() / 3600
+        }
+    
+    def _get_bucketed_usage_analytics(self, hours: int) -> Dict[str, Any]:
+        """Usage analytics from the hourly buckets, to the nearest hour, without scanning metrics."""
+        first_hour = int((time.time() - hours * 3600) // 3600)
+        buckets = [bucket for bucket in self.usage_buckets if bucket.hour >= first_hour]
         
-        # Top errors
-        error_metrics = [m for m in recent_metrics if m.status_code >= 400]
-        error_summary = defaultdict(int)
-        for error in error_metrics:
-            key = f"{error.status_code}_{error.endpoint}"
-            error_summary[key] += 1
+        if not buckets:
+            return {"error": "No data found for time period"}
+        
+        endpoint_usage = Counter()
+        error_summary = Counter()
+        hourly_usage = defaultdict(int)
+        for bucket in buckets:
+            endpoint_usage.update(bucket.endpoints)
+            error_summary.update(bucket.errors)
+            # Local hour of day, matching the metric timestamps
+            hourly_usage[datetime.fromtimestamp(bucket.hour * 3600).hour] += bucket.total
         
         return {
             "time_period_hours": hours,
-            "total_requests": len(recent_metrics),
+            "total_requests": sum(bucket.total for bucket in buckets),
             "unique_endpoints": len(endpoint_usage),
             "endpoint_usage": dict(endpoint_usage),
             "hourly_distribution": dict(hourly_usage),
@@ -187,6 +387,7 @@ class ErrorTracker:
     
     def __init__(self):
         self.errors: deque = deque(maxlen=1000)  # Keep last 1000 errors
+        self.error_times: deque = deque(maxlen=1000)  # Epoch seconds of each entry in errors, ascending
         self.error_patterns = defaultdict(int)
     
     def track_error(
@@ -198,8 +399,9 @@ class ErrorTracker:
         stack_trace: Optional[str] = None
     ):
         """Track an error occurrence."""
+        now = _cached_now()
         error_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "error_type": error_type,
             "error_message": error_message,
             "endpoint": endpoint,
@@ -208,6 +410,7 @@ class ErrorTracker:
         }
         
         self.errors.append(error_data)
+        self.error_times.append(now.timestamp())
         self.error_patterns[error_type] += 1
         
         # Log error
@@ -224,25 +427,24 @@ class ErrorTracker:
     
     def get_error_summary(self, hours: int = 24) -> Dict[str, Any]:
         """Get error summary for the specified time period."""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        recent_errors = [
-            error for error in self.errors 
-            if datetime.fromisoformat(error["timestamp"]) > cutoff_time
-        ]
+        # Errors are stored oldest first, so the window starts at the first time past the cutoff
+        start = bisect_right(self.error_times, time.time() - hours * 3600)
+        total_errors = len(self.errors) - start
         
         error_types = defaultdict(int)
         endpoints = defaultdict(int)
         
-        for error in recent_errors:
+        # Walk back from the newest error so only the window is visited, without copying it
+        for error in islice(reversed(self.errors), total_errors):
             error_types[error["error_type"]] += 1
             endpoints[error["endpoint"]] += 1
         
         return {
             "time_period_hours": hours,
-            "total_errors": len(recent_errors),
+            "total_errors": total_errors,
             "error_types": dict(error_types),
             "affected_endpoints": dict(endpoints),
-            "recent_errors": recent_errors[-10:]  # Last 10 errors
+            "recent_errors": list(islice(reversed(self.errors), min(total_errors, 10)))[::-1]  # Last 10 errors
         }
 
 
@@ -262,7 +464,7 @@ class MonitoringMiddleware:
             await self.app(scope, receive, send)
             return
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Extract request info
         method = scope["method"]
@@ -283,7 +485,7 @@ class MonitoringMiddleware:
             raise
         finally:
             # Record metrics
-            response_time = time.time() - start_time
+            response_time = time.perf_counter() - start_time
             performance_monitor.record_request(
                 endpoint=path,
                 method=method,
@@ -315,7 +517,8 @@ async def health_check_background_task():
     """Background task for periodic health checks."""
     while True:
         try:
-            health = performance_monitor.get_system_health()
+            # psutil reads /proc and the disk, so keep it off the event loop
+            health = await asyncio.to_thread(performance_monitor.get_system_health)
             
             # Log health metrics
             logger.info(f"System Health: CPU={health.cpu_percent}%, "
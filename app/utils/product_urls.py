@@ -5,6 +5,9 @@ This module contains the mapping of product names to their webpage URLs.
 For products marked as 'placeholder', the base FreshNutrients URL is used.
 """
 
+from types import MappingProxyType
+from typing import Mapping
+
 # Base URL for FreshNutrients website
 FRESHNUTRIENTS_BASE_URL = "https://freshnutrients.org"
 
@@ -25,6 +28,9 @@ PRODUCT_URLS = {
     "Soft Zinc": "https://www.freshnutrients.org/our-products/soft-zn",
 }
 
+# Read-only view handed out by get_all_product_urls instead of a fresh copy per call
+PRODUCT_URLS_VIEW: Mapping[str, str] = MappingProxyType(PRODUCT_URLS)
+
 
 def get_product_url(product_name: str) -> str:
     """
@@ -49,19 +55,17 @@ def add_product_url_to_context(product_context: dict) -> dict:
     Returns:
         Updated dictionary with product_url field added
     """
-    if "product_name" in product_context:
-        product_context["product_url"] = get_product_url(product_context["product_name"])
-    else:
-        product_context["product_url"] = FRESHNUTRIENTS_BASE_URL
+    product_name = product_context.get("product_name")
+    product_context["product_url"] = PRODUCT_URLS.get(product_name, FRESHNUTRIENTS_BASE_URL)
     
     return product_context
 
 
-def get_all_product_urls() -> dict:
+def get_all_product_urls() -> Mapping[str, str]:
     """
     Get all configured product URLs.
     
     Returns:
-        Dictionary mapping product names to URLs
+        Read-only mapping of product names to URLs
     """
-    return PRODUCT_URLS.copy()
+    return PRODUCT_URLS_VIEW
@@ -8,6 +8,39 @@ for the Wix website integration, removing technical jargon and system prompts.
 import re
 from typing import Dict, Any, List
 
+# Internal markers and system emojis stripped from responses, each emoji with one following space
+SYSTEM_MARKERS = ('🕐 TIMING QUESTION DETECTED', 'REQUIRED RESPONSE FORMAT:', '📊 CONTEXT ANALYSIS:', 'DEBUG:')
+SYSTEM_EMOJIS = ('🕐', '📊', '🌾', '⚠️', '✅', '❌', '🎯', '💡')
+
+# Compiled once so each response is cleaned in a single pass instead of one str.replace per marker
+_EMOJI_PATTERN = '(?:' + '|'.join(re.escape(emoji) for emoji in SYSTEM_EMOJIS) + ') ?'
+_SYSTEM_CONTENT_RE = re.compile('|'.join(re.escape(marker) for marker in SYSTEM_MARKERS) + '|' + _EMOJI_PATTERN)
+_EMOJI_RE = re.compile(_EMOJI_PATTERN)
+_BULLET_RE = re.compile(r'\n[-*]')
+_MULTI_NEWLINE_RE = re.compile(r'\n{3,}')
+
+# Lower-case phrases that classify a response, matched as plain substrings
+PRODUCT_INDICATORS = (
+    'freshnutrients',
+    'product:',
+    'products that match',
+    'recommended products',
+    'following products',
+    'application rate',
+    'npk'
+)
+ADVICE_INDICATORS = (
+    'application',
+    'timing',
+    'recommend',
+    'apply',
+    'growing stage',
+    'soil condition',
+    'best practice'
+)
+SAFETY_REMINDER_WORDS = ('apply', 'application', 'spray', 'fertilize')
+
+
 class WixResponseFormatter:
     """Formats AI responses for better user experience on Wix."""
     
@@ -29,60 +62,29 @@ class WixResponseFormatter:
         # Clean up technical system prompts and markers
         cleaned_response = WixResponseFormatter._remove_system_content(response)
         
-        # Format based on content type
-        if WixResponseFormatter._is_product_response(cleaned_response):
+        # Format based on content type (lower-cased once for all keyword checks)
+        text_lower = cleaned_response.lower()
+        if WixResponseFormatter._is_product_response(text_lower):
             return WixResponseFormatter._format_product_response(cleaned_response, metadata)
-        elif WixResponseFormatter._is_advice_response(cleaned_response):
-            return WixResponseFormatter._format_advice_response(cleaned_response)
+        elif WixResponseFormatter._is_advice_response(text_lower):
+            return WixResponseFormatter._format_advice_response(cleaned_response, text_lower)
         else:
             return WixResponseFormatter._format_general_response(cleaned_response)
     
     @staticmethod
     def _remove_system_content(text: str) -> str:
         """Remove technical system prompts and internal markers."""
-        # Simple string replacements instead of complex regex
-        text = text.replace('🕐 TIMING QUESTION DETECTED', '')
-        text = text.replace('REQUIRED RESPONSE FORMAT:', '')
-        text = text.replace('📊 CONTEXT ANALYSIS:', '')
-        text = text.replace('DEBUG:', '')
-        
-        # Remove common system emojis
-        emojis_to_remove = ['🕐', '📊', '🌾', '⚠️', '✅', '❌', '🎯', '💡']
-        for emoji in emojis_to_remove:
-            text = text.replace(emoji + ' ', '')
-            text = text.replace(emoji, '')
-        
-        return text.strip()
+        return _SYSTEM_CONTENT_RE.sub('', text).strip()
     
     @staticmethod
-    def _is_product_response(text: str) -> bool:
-        """Check if response contains product recommendations."""
-        product_indicators = [
-            'freshnutrients',
-            'product:',
-            'products that match',
-            'recommended products',
-            'following products',
-            'application rate',
-            'npk'
-        ]
-        text_lower = text.lower()
-        return any(indicator in text_lower for indicator in product_indicators)
+    def _is_product_response(text_lower: str) -> bool:
+        """Check if lower-cased response contains product recommendations."""
+        return any(indicator in text_lower for indicator in PRODUCT_INDICATORS)
     
     @staticmethod
-    def _is_advice_response(text: str) -> bool:
-        """Check if response contains farming advice."""
-        advice_indicators = [
-            'application',
-            'timing',
-            'recommend',
-            'apply',
-            'growing stage',
-            'soil condition',
-            'best practice'
-        ]
-        text_lower = text.lower()
-        return any(indicator in text_lower for indicator in advice_indicators)
+    def _is_advice_response(text_lower: str) -> bool:
+        """Check if lower-cased response contains farming advice."""
+        return any(indicator in text_lower for indicator in ADVICE_INDICATORS)
     
     @staticmethod
     def _format_product_response(text: str, metadata: Dict[str, Any] = None) -> str:
@@ -107,7 +109,7 @@ class WixResponseFormatter:
         return formatted
     
     @staticmethod
-    def _format_advice_response(text: str) -> str:
+    def _format_advice_response(text: str, text_lower: str) -> str:
         """Format farming advice responses."""
         formatted = "🎯 **Agricultural Guidance**\n\n"
         
@@ -116,7 +118,7 @@ class WixResponseFormatter:
         formatted += cleaned_text
         
         # Add safety reminder for application advice
-        if any(word in text.lower() for word in ['apply', 'application', 'spray', 'fertilize']):
+        if any(word in text_lower for word in SAFETY_REMINDER_WORDS):
             formatted += "\n\n⚠️ **Safety Reminder**: Always follow product label instructions and use appropriate protective equipment."
         
         return formatted
@@ -130,21 +132,12 @@ class WixResponseFormatter:
     @staticmethod
     def _clean_markdown_formatting(text: str) -> str:
         """Clean up markdown and improve readability."""
-        # Simple replacements instead of complex regex
-        text = text.replace('\n-', '\n• ')
-        text = text.replace('\n*', '\n• ')
-        
-        # Clean up excessive newlines
-        text = text.replace('\n\n\n', '\n\n')
-        text = text.replace('\n\n\n\n', '\n\n')
+        # Turn list markers into bullets and collapse runs of blank lines
+        text = _BULLET_RE.sub('\n• ', text)
+        text = _MULTI_NEWLINE_RE.sub('\n\n', text)
         
         # Remove any remaining system markers
-        emojis_to_remove = ['📊', '🌾', '⚠️', '✅', '❌', '🎯', '💡', '🕐']
-        for emoji in emojis_to_remove:
-            text = text.replace(emoji + ' ', '')
-            text = text.replace(emoji, '')
-        
-        return text.strip()
+        return _EMOJI_RE.sub('', text).strip()
     
     @staticmethod
     def format_error_response(error_message: str = None) -> str:
@@ -8,6 +8,8 @@ For production deployment, use:
     gunicorn app.main:app -k uvicorn.workers.UvicornWorker
 """
 
+import sys
+
 import uvicorn
 from app.config import settings
 from app.utils.logging import setup_logging
@@ -22,5 +24,7 @@ if __name__ == "__main__":
         host=settings.API_HOST,
         port=settings.API_PORT,
         reload=settings.ENVIRONMENT == "development",
-        log_level=settings.LOG_LEVEL.lower()
+        log_level=settings.LOG_LEVEL.lower(),
+        # uvloop (installed with uvicorn[standard]) is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop"
     )
@@ -1,5 +1,4 @@
 import http.server
-import socketserver
 import webbrowser
 import os
 import sys
@@ -15,11 +14,16 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         super().end_headers()
+    
+    def copyfile(self, source, outputfile):
+        # socket.sendfile uses os.sendfile where available, so file data skips user space
+        self.connection.sendfile(source)
 
 Handler = MyHTTPRequestHandler
 
 try:
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
+    # One thread per connection so the browser's parallel requests don't queue behind each other
+    with http.server.ThreadingHTTPServer(("", PORT), Handler) as httpd:
         print(f"Serving HTML files at http://localhost:{PORT}/")
         print(f"Open http://localhost:{PORT}/chat_test_interface.html in your browser")
         print("Press Ctrl+C to stop the server")